@@ -0,0 +1,176 @@
+# answercache.py
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+from datafiles import FileWatcher, atomic_write
+from metrics import metrics
+
+# File written into each Chroma persist directory whenever embeddings.py rebuilds it
+CORPUS_VERSION_FILE = "corpus_version"
+
+# Share of the source chunks (of the smaller set) a cached answer must have in common with the chunks
+# retrieved for the new question to be reused by the semantic tier: "apply for CPT" and "apply for OPT"
+# embed close to each other but retrieve different chunks
+MIN_SOURCE_OVERLAP = 0.5
+
+
+def mark_corpus_updated(persist_directory):
+    """
+    Records that the collection in persist_directory changed, which invalidates the answer caches.
+    """
+    os.makedirs(persist_directory, exist_ok=True)
+    with atomic_write(os.path.join(persist_directory, CORPUS_VERSION_FILE)) as file:
+        file.write(str(time.time()))
+
+
+def document_key(doc):
+    """Identifies a retrieved chunk: its parent record and position, or else its text."""
+    metadata = doc.metadata or {}
+    if metadata.get("parent_id") is not None:
+        return metadata["parent_id"], metadata.get("chunk_index")
+    return doc.page_content
+
+
+def source_overlap(keys, docs):
+    """Share of the smaller of keys and the keys of docs that both have."""
+    other = {document_key(doc) for doc in docs}
+    if not keys or not other:
+        return 0.0
+    return len(keys & other) / min(len(keys), len(other))
+
+
+def normalize_question(question):
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+class CacheEntry:
+    def __init__(self, answer, source_documents, embedding, latency):
+        self.answer = answer
+        self.source_documents = source_documents
+        self.embedding = embedding
+        self.source_keys = {document_key(doc) for doc in source_documents}
+        self.latency = latency
+        self.created = time.time()
+
+
+class AnswerCache:
+    """
+    Caches answers by (parent intent, normalized standalone question).
+    The exact tier matches the normalized question; the semantic tier matches the query embedding
+    by cosine similarity and the retrieved chunks by their overlap with the cached answer's sources.
+    Entries are evicted by size (LRU) and age, and the whole cache is cleared when one of the corpus
+    version files changes. fallback_threshold (None: disabled) is the similarity needed to answer
+    from the cache when the deadline is hit.
+    """
+
+    def __init__(self, max_entries=1000, ttl_seconds=86400, similarity_threshold=0.95, version_paths=(),
+                 fallback_threshold=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.fallback_threshold = fallback_threshold
+        self.version_paths = list(version_paths)
+        self._watcher = FileWatcher(self.version_paths)
+        self._entries = OrderedDict()
+        # Per intent: keys and stacked unit embeddings for the semantic tier (rebuilt lazily)
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        if self._watcher.changed():
+            self.clear()
+            metrics.incr("answer_cache_invalidations")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def _expired(self, entry):
+        return self.ttl_seconds and time.time() - entry.created > self.ttl_seconds
+
+    def _remove(self, key):
+        del self._entries[key]
+        self._matrices.pop(key[0], None)
+
+    def get_exact(self, intent_name, question):
+        self._check_version()
+        key = (intent_name, normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return self._count(entry, "exact")
+
+    def get_semantic(self, intent_name, embedding, docs, threshold=None):
+        """
+        Returns the closest cached entry of intent_name whose question embedding reaches the cosine
+        similarity threshold and whose sources overlap the chunks retrieved for the question (docs).
+        """
+        self._check_version()
+        threshold = self.similarity_threshold if threshold is None else threshold
+        query = _unit(embedding)
+        entry = None
+        with self._lock:
+            keys, matrix = self._matrix(intent_name)
+            if keys:
+                scores = matrix @ query
+                for best in np.argsort(-scores):
+                    if scores[best] < threshold:
+                        break
+                    key = keys[best]
+                    candidate = self._entries[key]
+                    if source_overlap(candidate.source_keys, docs) < MIN_SOURCE_OVERLAP:
+                        metrics.incr("answer_cache_source_mismatches")
+                        continue
+                    if self._expired(candidate):
+                        self._remove(key)
+                    else:
+                        self._entries.move_to_end(key)
+                        entry = candidate
+                    break
+        return self._count(entry, "semantic")
+
+    def _matrix(self, intent_name):
+        if intent_name not in self._matrices:
+            keys = [key for key, entry in self._entries.items() if key[0] == intent_name and entry.embedding is not None]
+            matrix = np.stack([self._entries[key].embedding for key in keys]) if keys else None
+            self._matrices[intent_name] = (keys, matrix)
+        return self._matrices[intent_name]
+
+    def _count(self, entry, tier):
+        if entry is None:
+            metrics.incr(f"answer_cache_{tier}_misses")
+        else:
+            metrics.incr(f"answer_cache_{tier}_hits")
+            metrics.incr("answer_cache_saved_seconds", entry.latency)
+        return entry
+
+    def put(self, intent_name, question, answer, source_documents, embedding=None, latency=0.0):
+        key = (intent_name, normalize_question(question))
+        entry = CacheEntry(answer, source_documents, _unit(embedding) if embedding is not None else None, latency)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._matrices.pop(intent_name, None)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._matrices.pop(old_key[0], None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _unit(embedding):
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,264 @@
+# answerpipeline.py
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.messages import get_buffer_string
+
+from chunking import count_tokens
+from contextbuilder import build_context, fit_history
+from metrics import metrics
+
+# Share of the deadline the rephrase step may use, the rest is left for retrieval and generation
+REPHRASE_BUDGET_SHARE = 0.3
+
+# Number of chunks and sentences per chunk used for the extractive fallback answer
+FALLBACK_CHUNKS = 2
+FALLBACK_SENTENCES = 2
+
+TIMEOUT_MESSAGE = "Sorry, this is taking longer than expected. Please try asking again in a moment."
+
+# Words and phrases that make a question depend on the earlier turns
+ANAPHORA_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|there|he|she|him|her|his|hers|one|ones|former|latter|"
+    r"same|above|previous|mentioned|else|also|too|more|another|other|instead|then)\b"
+    r"|^\s*(and|but|or|so|what about|how about|why not)\b"
+)
+
+# Questions this short ("why?", "how long?", "and for OPT?") are treated as follow-ups
+SHORT_QUESTION_WORDS = 3
+
+
+class LatencyBudget:
+    """
+    Tracks the time left before the Dialogflow webhook deadline and records how long each stage took.
+    A deadline of None or 0 means no limit.
+    """
+
+    def __init__(self, deadline_seconds=None):
+        self.deadline_seconds = deadline_seconds or None
+        self.start = time.perf_counter()
+        self.timings = {}
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def remaining(self):
+        if self.deadline_seconds is None:
+            return None
+        return max(self.deadline_seconds - self.elapsed(), 0.0)
+
+    def limit(self, share=1.0):
+        """
+        Returns the timeout for the next stage: the remaining time, capped to a share of the whole deadline.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        return min(remaining, self.deadline_seconds * share)
+
+    def record(self, stage, seconds):
+        self.timings[stage] = round(seconds, 4)
+        metrics.observe(f"stage_{stage}", seconds)
+
+
+def extractive_fallback(docs):
+    """
+    Builds a short answer from the first sentences of the top retrieved chunks.
+    """
+    sentences = []
+    for doc in docs[:FALLBACK_CHUNKS]:
+        parts = re.split(r"(?<=[.!?])\s+", doc.page_content.strip())
+        sentences.append(" ".join(parts[:FALLBACK_SENTENCES]))
+    sentences = [sentence for sentence in sentences if sentence]
+    if not sentences:
+        return TIMEOUT_MESSAGE
+    return "Here is what I found in the sources:\n\n" + "\n\n".join(sentences)
+
+
+def is_follow_up(question):
+    """
+    True when the question may refer to the earlier turns and needs rephrasing into a standalone question.
+    """
+    question = question.lower()
+    return len(re.findall(r"\w+", question)) <= SHORT_QUESTION_WORDS or bool(ANAPHORA_PATTERN.search(question))
+
+
+class QuestionCondenser:
+    """
+    Decides whether the follow-up question must be rephrased by the LLM and caches the rephrasings
+    by (chat history hash, question). Counts the LLM calls and the time avoided.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.call_seconds = 0.0
+
+    @staticmethod
+    def _key(question, chat_history_str):
+        return hashlib.sha256(chat_history_str.encode("utf-8")).hexdigest(), " ".join(question.lower().split())
+
+    def _skipped(self, reason):
+        metrics.incr(f"rephrase_skipped_{reason}")
+        metrics.incr("rephrase_llm_calls_avoided")
+        # Estimated from the average duration of the rephrase calls made so far
+        if self.calls:
+            metrics.incr("rephrase_seconds_saved", self.call_seconds / self.calls)
+
+    async def condense(self, chain, question, chat_history_str, timeout=None):
+        if not chat_history_str:
+            self._skipped("empty_history")
+            return question
+        if not is_follow_up(question):
+            self._skipped("self_contained")
+            return question
+        key = self._key(question, chat_history_str)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            self._skipped("cached")
+            return cached
+
+        start = time.perf_counter()
+        new_question = await asyncio.wait_for(_rephrase(chain, question, chat_history_str), timeout=timeout)
+        self.calls += 1
+        self.call_seconds += time.perf_counter() - start
+        metrics.incr("rephrase_llm_calls")
+        with self._lock:
+            self._cache[key] = new_question
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return new_question
+
+
+# Shared condenser (and rephrasing cache) of all chains
+question_condenser = QuestionCondenser()
+
+
+async def _rephrase(chain, question, chat_history_str):
+    question_generator = chain.question_generator
+    result = await question_generator.ainvoke({"question": question, "chat_history": chat_history_str})
+    return result[question_generator.output_key]
+
+
+async def _stream_answer(llm, messages, parts):
+    async for chunk in llm.astream(messages):
+        parts.append(chunk.content)
+
+
+def _result(question, new_question, answer, docs, deadline_exceeded, budget, cached=False):
+    budget.record("total", budget.elapsed())
+    return {
+        "question": question,
+        "generated_question": new_question,
+        "answer": answer,
+        "source_documents": docs,
+        "deadline_exceeded": deadline_exceeded,
+        "cached": cached,
+        "timings": dict(budget.timings)
+    }
+
+
+async def generate_answer(chain, question, chat_history, budget, cache=None, intent_name=None,
+                          context_tokens=None, history_tokens=None):
+    """
+    Runs the rephrase, retrieve and generate stages of a ConversationalRetrievalChain within the latency budget.
+    The answer is streamed from the LLM; if the deadline is hit the partial answer, or else a cached
+    answer to a similar question or an extractive answer from the retrieved chunks, is returned.
+    With an answer cache, the standalone question is looked up (exact, then by its embedding) before
+    retrieval and complete answers are stored in it.
+    The retrieved chunks and the chat history are fitted into the context_tokens and history_tokens budgets.
+    """
+    # Keep the most recent turns that fit in the history budget
+    chat_history_str = fit_history(chat_history, history_tokens)
+    history_saved = count_tokens(get_buffer_string(chat_history)) - count_tokens(chat_history_str) if chat_history else 0
+    new_question = question
+    docs = []
+    embedding = []
+    deadline_exceeded = False
+
+    # Stage 1: rephrase the follow up question into a standalone question, when it may depend on the history
+    start = time.perf_counter()
+    try:
+        new_question = await question_condenser.condense(
+            chain, question, chat_history_str, timeout=budget.limit(REPHRASE_BUDGET_SHARE)
+        )
+    except asyncio.TimeoutError:
+        # Retrieve with the original question instead
+        metrics.incr("rephrase_timeouts")
+    budget.record("rephrase", time.perf_counter() - start)
+
+    # Exact answer cache lookup on the standalone question
+    if cache is not None:
+        entry = cache.get_exact(intent_name, new_question)
+        if entry is not None:
+            return _result(question, new_question, entry.answer, entry.source_documents, False, budget, cached=True)
+
+    # Stage 2: retrieve the relevant chunks (the query embedding, if one was computed, is kept for the semantic cache)
+    start = time.perf_counter()
+    try:
+        docs = await asyncio.wait_for(chain.retriever.asearch(new_question, embedding), timeout=budget.limit())
+    except asyncio.TimeoutError:
+        deadline_exceeded = True
+    budget.record("retrieve", time.perf_counter() - start)
+
+    # Semantic answer cache lookup on the query embedding
+    if cache is not None and embedding and not deadline_exceeded:
+        entry = cache.get_semantic(intent_name, embedding[0], docs)
+        if entry is not None:
+            return _result(question, new_question, entry.answer, entry.source_documents, False, budget, cached=True)
+
+    # Stage 3: stream the answer from the LLM
+    parts = []
+    if not deadline_exceeded:
+        combine_chain = chain.combine_docs_chain
+        context, docs, context_saved = build_context(
+            docs, combine_chain.document_prompt, combine_chain.document_separator, context_tokens
+        )
+        metrics.incr("context_tokens_saved", context_saved + history_saved)
+        print(f"Prompt tokens saved: {context_saved} context, {history_saved} history ({len(docs)} chunks used).")
+        messages = combine_chain.llm_chain.prompt.format_messages(
+            context=context,
+            question=new_question if chain.rephrase_question else question,
+            chat_history=chat_history_str
+        )
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(_stream_answer(combine_chain.llm_chain.llm, messages, parts), timeout=budget.limit())
+        except asyncio.TimeoutError:
+            deadline_exceeded = True
+        budget.record("generate", time.perf_counter() - start)
+
+    answer = "".join(parts).strip()
+    if deadline_exceeded:
+        metrics.incr("deadline_exceeded")
+        entry = None
+        if not answer and cache is not None and cache.fallback_threshold and embedding and docs:
+            entry = cache.get_semantic(intent_name, embedding[0], docs, threshold=cache.fallback_threshold)
+        if answer:
+            metrics.incr("partial_answers")
+            answer += " ..."
+        elif entry is not None:
+            metrics.incr("cached_fallbacks")
+            return _result(question, new_question, entry.answer, entry.source_documents, True, budget, cached=True)
+        elif docs:
+            metrics.incr("extractive_fallbacks")
+            answer = extractive_fallback(docs)
+        else:
+            answer = TIMEOUT_MESSAGE
+    elif cache is not None:
+        cache.put(
+            intent_name, new_question, answer, docs,
+            embedding=embedding[0] if embedding else None,
+            latency=budget.elapsed()
+        )
+
+    return _result(question, new_question, answer, docs, deadline_exceeded, budget)
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Regular package, so `python -m benchmarks.<script>` from the repository root never resolves to an
+# installed package of the same name.
@@ -0,0 +1,75 @@
+# benchmarks/bench_concurrency.py
+# Shows that webhook requests overlap on one event loop when the chain, LLM and vector search are async.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_concurrency --requests 20 --llm-latency 0.2 --embed-latency 0.05
+#   python benchmarks/bench_concurrency.py --requests 20
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+if __package__ in (None, ""):
+    # Run as a file: import the benchmarks package and the app modules from the repository root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import SAMPLE_DOCUMENTS, SlowChatModel, SlowEmbeddings, build_stub_stores
+from chainregistry import ChainRegistry
+from sessionstore import new_memory
+
+
+async def timed_request(registry, index, blocking):
+    memory = new_memory()
+    question = f"Question {index}: how do I apply for CPT?"
+    start = time.perf_counter()
+    if blocking:
+        # What the webhook did before: a synchronous chain call inside the coroutine
+        registry.get("Get_CPT_OPT_Info").invoke({"question": question, "chat_history": []})
+    else:
+        await registry.arun("Get_CPT_OPT_Info", question, memory)
+    return start, time.perf_counter()
+
+
+def max_overlap(intervals):
+    """
+    Returns the largest number of requests that were in flight at the same time.
+    """
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    current = best = 0
+    for _, delta in events:
+        current += delta
+        best = max(best, current)
+    return best
+
+
+async def run(registry, requests, blocking):
+    start = time.perf_counter()
+    intervals = await asyncio.gather(*[timed_request(registry, i, blocking) for i in range(requests)])
+    return time.perf_counter() - start, max_overlap(intervals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    embedding = SlowEmbeddings(size=64, latency=args.embed_latency)
+    chroma_store, chroma_store1 = build_stub_stores(embedding, SAMPLE_DOCUMENTS)
+    registry = ChainRegistry(chroma_store, chroma_store1, llm=SlowChatModel(latency=args.llm_latency), verbose=False)
+
+    # One answer costs one embedding call and one LLM call (no chat history, so no rephrase)
+    per_request = args.llm_latency + args.embed_latency
+    print(f"{args.requests} requests, ~{per_request:.2f}s of backend latency each "
+          f"(serial total ~{per_request * args.requests:.2f}s)")
+    for label, blocking in (("blocking", True), ("async", False)):
+        elapsed, overlap = asyncio.run(run(registry, args.requests, blocking))
+        print(f"{label:>8}: {elapsed:.2f}s wall time, {args.requests / elapsed:.1f} req/s, "
+              f"max {overlap} requests in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# benchmarks/bench_scrape.py
+# Crawls the offline fixture sites with the scraper's crawler and extractors, reports pages/sec, the
+# time spent parsing and in each extractor and the normalization stage, and checks the extracted
+# records against the golden outputs, also for an incremental re-crawl whose seed pages fail (HTTP 503)
+# and must be served from the page cache, and checks the normalization stage on fixtures/normalization.json.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_scrape --rounds 5
+#   python -m benchmarks.bench_scrape --update-golden   # after an intended change of the extractors
+#   python benchmarks/bench_scrape.py --rounds 5
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+if __package__ in (None, ""):
+    # Run as a file: import the benchmarks package and the app modules from the repository root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.scrape_fixtures import FIXTURE_SITES, FixtureServer, load_golden, load_normalization_cases, save_golden
+from corpusnormalizer import normalize_records
+from crawler import Crawler, HostPoliteness, HttpFetcher, Page
+from extractors import HANDLERS
+from scrape import crawl_site, site_seeds
+
+
+def timed_handlers(timings):
+    """The extractors wrapped to record (parse seconds, extract seconds) per request kind."""
+    def wrap(kind, handler):
+        def timed(page, request):
+            start = time.perf_counter()
+            page.soup
+            parsed = time.perf_counter()
+            try:
+                return handler(page, request)
+            finally:
+                timings[kind].append((parsed - start, time.perf_counter() - parsed))
+        return timed
+    return {kind: wrap(kind, handler) for kind, handler in HANDLERS.items()}
+
+
+async def crawl_round(config, workers, per_host, timings):
+    """Crawls all fixture sites concurrently, like scrape.scrape. Returns {site: records} and the pages fetched."""
+    fetcher = HttpFetcher()
+    politeness = HostPoliteness(per_host, 0.0)
+    handlers = timed_handlers(timings)
+    crawlers = {site: Crawler(handlers, fetcher, workers=workers, politeness=politeness) for site in config}
+    try:
+        outcomes = await asyncio.gather(*(crawlers[site].crawl(site_seeds(site, config)) for site in config))
+    finally:
+        await fetcher.close()
+    pages = sum(crawler.stats["fetched"] for crawler in crawlers.values())
+    return dict(zip(config, outcomes)), pages
+
+
+class FailingFetcher:
+    """Answers HTTP 503 for the given URLs, like a server that is down, and fetches the others."""
+
+    def __init__(self, fetcher, urls):
+        self.fetcher = fetcher
+        self.urls = set(urls)
+
+    async def fetch(self, url, headers=None):
+        if url in self.urls:
+            return Page(url, 503, "")
+        return await self.fetcher.fetch(url, headers)
+
+    async def close(self):
+        await self.fetcher.close()
+
+
+async def stale_cache_round(config, workers, per_host):
+    """
+    Crawls each fixture site into a fresh page cache with a full crawl, which must still fill the cache,
+    then incrementally with all its seed pages failing. Returns the records of the second crawl and the number of cached pages it dropped.
+    """
+    results, dropped = {}, 0
+    with tempfile.TemporaryDirectory() as directory:
+        page_cache_path = f"{directory}/page_cache.db"
+        politeness = HostPoliteness(per_host, 0.0)
+        for site in config:
+            fetcher = HttpFetcher()
+            try:
+                await crawl_site(site, fetcher, politeness, config, workers, page_cache_path, full=True)
+            finally:
+                await fetcher.close()
+            fetcher = FailingFetcher(HttpFetcher(), [page["url"] for page in config[site]["pages"]])
+            try:
+                results[site], stats = await crawl_site(site, fetcher, politeness, config, workers, page_cache_path)
+            finally:
+                await fetcher.close()
+            dropped += stats["dropped"]
+    return results, dropped
+
+
+def compare(results, golden):
+    """Differences between the records and the golden ones, as printable lines."""
+    problems = []
+    for site in sorted(set(golden) | set(results)):
+        expected, actual = golden.get(site, []), results.get(site, [])
+        if len(expected) != len(actual):
+            problems.append(f"{site}: {len(actual)} records, expected {len(expected)}")
+        for index, (want, got) in enumerate(zip(expected, actual)):
+            for field in ("Section", "Link", "Title", "Text"):
+                if want[field] != got[field]:
+                    problems.append(f"{site} record {index} ({want['Link']}): {field} differs: "
+                                    f"{got[field][:60]!r} != {want[field][:60]!r}")
+    return problems
+
+
+def check_normalization(cases):
+    """
+    Differences between the normalized fixture records and the expected ones: the boilerplate lines
+    are removed, the page-specific lines kept, near duplicates under other URLs collapsed into the
+    first record, and a page listed under two sections kept in both.
+    """
+    records, report = normalize_records(cases["records"])
+    problems = [f"normalization: {key} is {report[key]}, expected {value}"
+                for key, value in cases["expected_report"].items() if report[key] != value]
+    if len(records) != len(cases["expected"]):
+        problems.append(f"normalization: {len(records)} records, expected {len(cases['expected'])}")
+    for want, got in zip(cases["expected"], records):
+        for field in ("Section", "Link", "Title", "Text"):
+            if want[field] != got[field]:
+                problems.append(f"normalization ({want['Link']}): {field} differs: {got[field][:60]!r} != {want[field][:60]!r}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--update-golden", action="store_true", help="Save this run's records as the golden outputs")
+    args = parser.parse_args()
+
+    timings = defaultdict(list)
+    with FixtureServer() as server:
+        config = server.localize(FIXTURE_SITES)
+        elapsed, pages = [], 0
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            results, fetched = asyncio.run(crawl_round(config, args.workers, args.per_host, timings))
+            elapsed.append(time.perf_counter() - start)
+            pages += fetched
+        results = {site: server.delocalize(records) for site, records in results.items()}
+        stale, dropped = asyncio.run(stale_cache_round(config, args.workers, args.per_host))
+        stale = {site: server.delocalize(records) for site, records in stale.items()}
+
+    total = sum(elapsed)
+    print(f"{args.rounds} rounds, {pages // args.rounds} pages per round: {pages / total:.1f} pages/sec "
+          f"(best round {min(elapsed) * 1000:.1f} ms)")
+    print(f"{'extractor':<14}{'calls':>7}{'parse ms':>11}{'extract ms':>12}")
+    for kind, samples in sorted(timings.items()):
+        parse = sum(sample[0] for sample in samples) / len(samples) * 1000
+        extract = sum(sample[1] for sample in samples) / len(samples) * 1000
+        print(f"{kind:<14}{len(samples):>7}{parse:>11.3f}{extract:>12.3f}")
+    for site, records in sorted(results.items()):
+        start = time.perf_counter()
+        _, report = normalize_records(records)
+        print(f"normalize {site}: {(time.perf_counter() - start) * 1000:.2f} ms, {report['duplicates_removed']} duplicates, "
+              f"{report['boilerplate_lines_removed']} boilerplate lines, {report['bytes_removed']} bytes removed")
+
+    if args.update_golden:
+        save_golden(results)
+        print("Golden outputs updated.")
+        return
+    golden = load_golden()
+    problems = compare(results, golden)
+    for problem in problems:
+        print(problem)
+    print(f"Golden outputs: {'MISMATCH' if problems else 'OK'} "
+          f"({sum(len(records) for records in results.values())} records)")
+    # Seed pages that fail on a re-crawl keep the records and links cached by the full crawl
+    stale_problems = compare(stale, golden) + ([f"{dropped} cached pages dropped"] if dropped else [])
+    for problem in stale_problems:
+        print(problem)
+    print(f"Failing seed pages served from the page cache: {'MISMATCH' if stale_problems else 'OK'} "
+          f"({sum(len(records) for records in stale.values())} records)")
+    normalization_problems = check_normalization(load_normalization_cases())
+    for problem in normalization_problems:
+        print(problem)
+    print(f"Normalization fixtures: {'MISMATCH' if normalization_problems else 'OK'}")
+    if problems or stale_problems or normalization_problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/scrape_fixtures.py
+# Offline copies of the page shapes the scrapers handle (dil, isss, csee/ai and cybersecurity pages:
+# main-content, entry-header, sights-expander accordions and dropdowns, sidebars, a login wall),
+# served by a local HTTP server. Files live under fixtures/sites/<host>/<path>/index.html.
+
+import json
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "sites")
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "golden.json")
+# Records of one site with boilerplate lines, duplicates under other URLs and a page listed under two
+# sections, and the expected output of corpusnormalizer.normalize_records
+NORMALIZATION_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "normalization.json")
+
+# Crawl config of the fixtures, in the format of crawlconfig.SITES, with the live URLs
+FIXTURE_SITES = {
+    "dil.umbc.edu": {
+        "internal_host": "dil.umbc.edu",
+        "pages": [
+            {"section": "Courses", "url": "https://dil.umbc.edu/courses/", "kind": "courses"},
+            {"section": "Advising & Resources", "url": "https://dil.umbc.edu/resources/", "kind": "section"},
+            {"section": "Policies", "url": "https://dil.umbc.edu/policies/", "kind": "section"}
+        ]
+    },
+    "isss.umbc.edu": {
+        "internal_host": None,
+        "pages": [
+            {"section": "Current Students: General", "kind": "notitle",
+             "url": "https://isss.umbc.edu/international-students-f-1/current-students/"},
+            {"section": "Social Security Number (SSN)", "kind": "notitle",
+             "url": "https://isss.umbc.edu/f-1-students/social-security-number/"},
+            {"section": "Internships and International Students", "kind": "dropdown",
+             "url": "https://dil.umbc.edu/resources/internships-and-international-students/"},
+            {"section": "OPT and OPT STEM Information", "kind": "dropdown",
+             "url": "https://isss.umbc.edu/opt-and-opt-stem-information/"}
+        ]
+    },
+    "research": {
+        "internal_host": "dil.umbc.edu",
+        "pages": [
+            {"section": "CSEE Research Areas", "url": "https://www.csee.umbc.edu/csee-research-areas/", "kind": "section"},
+            {"section": "AI Home", "url": "https://ai.umbc.edu/", "kind": "section"},
+            {"section": "Cyber Security labs", "url": "https://cybersecurity.umbc.edu/training/labs/", "kind": "section"}
+        ]
+    }
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Serves the fixtures on a free local port from a background thread, as http://127.0.0.1:<port>/<host>/<path>.
+    """
+
+    def __init__(self, directory=FIXTURE_DIR):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def localize(self, config):
+        """The config with its live URLs pointing to this server."""
+        return {
+            site: dict(entry, pages=[dict(page, url=self.base_url + "/" + page["url"].split("://", 1)[1])
+                                     for page in entry["pages"]])
+            for site, entry in config.items()
+        }
+
+    def delocalize(self, records):
+        """The records with the live links instead of this server's."""
+        prefix = self.base_url + "/"
+        return [dict(record, Link="https://" + record["Link"][len(prefix):]) if record["Link"].startswith(prefix)
+                else record for record in records]
+
+
+def load_golden(path=GOLDEN_PATH):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_golden(results, path=GOLDEN_PATH):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+        file.write("\n")
+
+
+def load_normalization_cases(path=NORMALIZATION_PATH):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
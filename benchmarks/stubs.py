@@ -0,0 +1,86 @@
+# benchmarks/stubs.py
+# Stub LLM and embedding backends with a fixed latency, so benchmarks run offline without OpenAI calls.
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class SlowChatModel(BaseChatModel):
+    """
+    Chat model that waits `latency` seconds and echoes the start of the last message.
+    When streamed, the latency is spread evenly over the words of the reply.
+    """
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-stub"
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        text = f"Stub answer to: {messages[-1].content[:60]}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        words = self._reply(messages).generations[0].message.content.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else " " + word))
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    """
+    Deterministic fake embeddings that block for `latency` seconds per query, like a network call.
+    """
+    latency: float = 0.05
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def build_stub_stores(embedding, documents):
+    """
+    Builds in-memory Chroma stores for the general and research collections from (text, metadata) pairs.
+    """
+    from langchain_chroma import Chroma
+
+    chroma_store = Chroma(collection_name="bench_retriever_bot", embedding_function=embedding)
+    chroma_store1 = Chroma(collection_name="bench_research_info", embedding_function=embedding)
+    texts = [text for text, _ in documents]
+    metadatas = [metadata for _, metadata in documents]
+    chroma_store.add_texts(texts=texts, metadatas=metadatas)
+    chroma_store1.add_texts(texts=texts, metadatas=metadatas)
+    return chroma_store, chroma_store1
+
+
+SAMPLE_DOCUMENTS = [
+    ("CPT requires one academic year of full-time enrollment and a job offer related to the major.",
+     {"section": "CPT", "link": "https://isss.umbc.edu/cpt/", "title": "CPT Eligibility"}),
+    ("OPT can be requested up to 90 days before the program end date.",
+     {"section": "OPT", "link": "https://isss.umbc.edu/opt/", "title": "OPT Application"}),
+    ("DATA 601 Introduction to Data Science is the first course of the program.",
+     {"section": "Courses", "link": "https://dil.umbc.edu/courses/", "title": "DATA 601"}),
+    ("DATA 602 requires DATA 601 or an equivalent background in machine learning.",
+     {"section": "Courses", "link": "https://dil.umbc.edu/courses/", "title": "DATA 602"}),
+    ("The AI faculty work on natural language processing, robotics and knowledge graphs.",
+     {"section": "Research", "link": "https://ai.umbc.edu/ai-faculty/", "title": "AI Faculty"}),
+]
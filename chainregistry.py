@@ -0,0 +1,82 @@
+# chainregistry.py
+
+import time
+from langchain.chains import ConversationalRetrievalChain
+
+from answerpipeline import LatencyBudget, generate_answer
+from feedback import load_llm
+from intentregistry import intent_registry
+from queryhandler import build_retriever
+from metrics import metrics
+
+
+class ChainRegistry:
+    """
+    Builds one ConversationalRetrievalChain per parent intent of the intent registry at startup and reuses it
+    for every request. The chains hold no memory; the session memory is bound when the chain is called.
+    """
+
+    def __init__(self, chroma_store, chroma_store1, llm=None, verbose=True, deadline_seconds=None, answer_cache=None,
+                 lexical_index=None, lexical_index1=None, registry=None):
+        # Collections by store name of the intent registry
+        self.stores = {
+            "general": (chroma_store, lexical_index),
+            "research": (chroma_store1, lexical_index1)
+        }
+        self.registry = registry if registry is not None else intent_registry
+        self.verbose = verbose
+        self.deadline_seconds = deadline_seconds
+        self.answer_cache = answer_cache
+
+        # Shared LLM client (and its pooled HTTP connections) for all chains
+        start = time.perf_counter()
+        self.llm = llm if llm is not None else load_llm()
+        self.llm_build_seconds = time.perf_counter() - start
+
+        self.chains = {}
+        self.build_seconds = {}
+        for intent_name, config in self.registry.configs.items():
+            self.chains[intent_name] = self._build(config)
+        # Fallback chain for intents without a parent intent
+        self.default_chain = self._build(self.registry.default)
+        metrics.observe("chain_registry_build", self.llm_build_seconds + sum(self.build_seconds.values()))
+
+    def _build(self, config):
+        start = time.perf_counter()
+        chroma_store, lexical_index = self.stores[config.store]
+        retriever = build_retriever(chroma_store, lexical_index, k=config.k)
+        chain = ConversationalRetrievalChain.from_llm(
+            llm=self.llm,
+            retriever=retriever,
+            combine_docs_chain_kwargs={'prompt': config.prompt},
+            return_source_documents=True,
+            verbose=self.verbose,
+            rephrase_question=True,
+        )
+        self.build_seconds[config.name] = time.perf_counter() - start
+        return chain
+
+    def get(self, intent_name):
+        return self.chains.get(self.registry.config(intent_name).name, self.default_chain)
+
+    async def arun(self, intent_name, question, memory):
+        """
+        Runs the prebuilt chain of the intent with the session memory and saves the new turn to it.
+        The answer is generated within the registry's deadline (see answerpipeline.generate_answer).
+        """
+        chain = self.get(intent_name)
+        config = self.registry.config(intent_name)
+        key = config.name
+        # Per-request construction that the prebuilt chain avoids
+        metrics.incr("chain_requests")
+        metrics.incr("chain_construction_seconds_saved", self.build_seconds[key] + self.llm_build_seconds)
+
+        budget = LatencyBudget(self.deadline_seconds)
+        result = await generate_answer(
+            chain, question, memory.chat_memory.messages.copy(), budget,
+            cache=self.answer_cache if config.cache else None, intent_name=key,
+            context_tokens=config.context_tokens, history_tokens=config.history_tokens
+        )
+        print(f"Stage timings: {result['timings']} | Deadline exceeded: {result['deadline_exceeded']} | Cached: {result['cached']}")
+        memory.save_context({"question": question}, {"answer": result['answer']})
+        return result
@@ -0,0 +1,88 @@
+# chunking.py
+
+import hashlib
+from functools import lru_cache
+import tiktoken
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Tokenizer of the OpenAI embedding and chat models
+ENCODING_NAME = "cl100k_base"
+
+# Rough characters per token, used when the tokenizer cannot be loaded (offline)
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding():
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        print(f"Could not load the {ENCODING_NAME} tokenizer, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text):
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens."""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def parent_id(link, title):
+    """ID of the page (corpus row) a chunk was split from."""
+    return hashlib.sha256(f"{link}\x00{title}".encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_id(parent, index, chunk):
+    """Content-hash ID of a chunk, stable across runs."""
+    return hashlib.sha256(f"{parent}\x00{index}\x00{chunk}".encode("utf-8")).hexdigest()
+
+
+def make_text_splitter(settings):
+    """Token-aware splitter: chunk_size and chunk_overlap are counted in tokens."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=settings["chunk_size"],
+        chunk_overlap=settings["chunk_overlap"],
+        length_function=count_tokens
+    )
+
+
+def split_rows(rows, settings):
+    """
+    Split a batch of corpus rows (dicts with Section, Link, Title and Text) into chunks.
+    Returns a list of (chunk ID, text, metadata). Runs in the ingest process pool.
+    settings: chunk_size and chunk_overlap (in tokens). Rows are validated beforehand (corpus.validate).
+    Each chunk's metadata links it to its page: parent_id, chunk_index and chunk_count.
+    """
+    text_splitter = make_text_splitter(settings)
+
+    chunks = []
+    for row in rows:
+        # Split the text into chunks and filter out empty chunks
+        texts = [chunk for chunk in text_splitter.split_text(row["Text"]) if chunk.strip()]
+        if not texts:
+            print(f"No valid chunks for {row['Link']} ({row['Title']}), skipping.")
+            continue
+
+        parent = parent_id(row["Link"], row["Title"])
+        for index, text in enumerate(texts):
+            # Prepare metadata
+            metadata = {
+                "section": row["Section"],
+                "link": row["Link"],
+                "title": row["Title"],
+                "parent_id": parent,
+                "chunk_index": index,
+                "chunk_count": len(texts)
+            }
+            chunks.append((chunk_id(parent, index, text), text, metadata))
+    return chunks
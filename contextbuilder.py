@@ -0,0 +1,96 @@
+# contextbuilder.py
+
+import re
+from langchain_core.messages import get_buffer_string
+from langchain_core.prompts import format_document
+
+from chunking import count_tokens, truncate_tokens
+from metrics import metrics
+from summarymemory import split_turns
+
+# Word shingle size and minimum Jaccard similarity of two chunks considered duplicates
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.8
+
+# Smallest truncated chunk worth putting in the prompt
+MIN_CHUNK_TOKENS = 50
+
+
+def shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def dedupe_documents(docs):
+    """
+    Drops chunks that are near-identical to a higher ranked chunk (the same text scraped from two pages).
+    """
+    kept, kept_shingles = [], []
+    for doc in docs:
+        doc_shingles = shingles(doc.page_content)
+        if any(len(doc_shingles & other) / len(doc_shingles | other) >= DUPLICATE_THRESHOLD for other in kept_shingles):
+            continue
+        kept.append(doc)
+        kept_shingles.append(doc_shingles)
+    return kept
+
+
+def fit_history(messages, max_tokens):
+    """
+    Returns the chat history string of the most recent turns that fit in max_tokens, dropping the oldest first.
+    A human message and the AI answer that follows it are kept or dropped together; the conversation
+    summary is always kept.
+    """
+    summary, turns = split_turns(messages)
+
+    kept, used = [], 0
+    summary_text = get_buffer_string([summary]) if summary is not None else ""
+    if summary_text and max_tokens is not None:
+        summary_text = truncate_tokens(summary_text, max_tokens)
+    used = count_tokens(summary_text) if summary_text else 0
+    for turn in reversed(turns):
+        text = get_buffer_string(turn)
+        tokens = count_tokens(text)
+        if max_tokens is not None and used + tokens > max_tokens:
+            break
+        kept.insert(0, text)
+        used += tokens
+    if summary_text:
+        kept.insert(0, summary_text)
+    return "\n".join(kept)
+
+
+def fit_documents(docs, document_prompt, separator, max_tokens):
+    """
+    Formats the chunks in rank order and keeps those that fit in max_tokens; the last one may be truncated.
+    Returns the context string and the chunks used.
+    """
+    parts, used_docs, used = [], [], 0
+    separator_tokens = count_tokens(separator) if separator else 0
+    for doc in docs:
+        text = format_document(doc, document_prompt)
+        tokens = count_tokens(text) + (separator_tokens if parts else 0)
+        if max_tokens is not None and used + tokens > max_tokens:
+            room = max_tokens - used - (separator_tokens if parts else 0)
+            if room >= MIN_CHUNK_TOKENS:
+                parts.append(truncate_tokens(text, room))
+                used_docs.append(doc)
+            break
+        parts.append(text)
+        used_docs.append(doc)
+        used += tokens
+    return separator.join(parts), used_docs
+
+
+def build_context(docs, document_prompt, separator, context_tokens=None):
+    """
+    Dedupes the retrieved chunks and fits them into the context token budget of the intent.
+    Returns the context string, the chunks used and the number of tokens saved.
+    """
+    full_tokens = sum(count_tokens(format_document(doc, document_prompt)) for doc in docs)
+    unique_docs = dedupe_documents(docs)
+    context, used_docs = fit_documents(unique_docs, document_prompt, separator, context_tokens)
+    metrics.incr("context_duplicate_chunks", len(docs) - len(unique_docs))
+    return context, used_docs, max(full_tokens - count_tokens(context), 0)
@@ -0,0 +1,153 @@
+# corpus.py
+
+import hashlib
+import os
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from datafiles import atomic_write
+
+# Parquet corpus written by scrape.py and read by embeddings.py, one partition per site
+CORPUS_DIR = "Data/corpus"
+
+# CSV export of each site, for humans (and the course catalog)
+SITE_CSV = {
+    "dil.umbc.edu": "Data/dil_scraped_data.csv",
+    "isss.umbc.edu": "Data/isss_scraped_data.csv",
+    "research": "Data/research_data.csv"
+}
+
+CSV_COLUMNS = ["Section", "Link", "Title", "Text"]
+
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("Section", pa.string()),
+    ("Link", pa.string()),
+    ("Title", pa.string()),
+    ("Text", pa.string()),
+    ("content_hash", pa.string()),
+    ("scraped_at", pa.timestamp("s"))
+])
+
+
+def record_id(record, occurrence=0):
+    """Stable ID of a corpus record: its section, link and title (and rank among identical ones)."""
+    key = f"{record['Section']}\x00{record['Link']}\x00{record['Title']}\x00{occurrence}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def record_ids(records):
+    seen = {}
+    ids = []
+    for record in records:
+        identity = (record['Section'], record['Link'], record['Title'])
+        ids.append(record_id(record, seen.get(identity, 0)))
+        seen[identity] = seen.get(identity, 0) + 1
+    return ids
+
+
+def diff_records(old_records, new_records):
+    """
+    Changeset between two versions of a corpus: records added, modified (same ID, other text) and removed.
+    """
+    old = dict(zip(record_ids(old_records), old_records))
+    new = dict(zip(record_ids(new_records), new_records))
+    return {
+        "added": [dict(record, id=key) for key, record in new.items() if key not in old],
+        "modified": [dict(record, id=key) for key, record in new.items()
+                     if key in old and old[key]['Text'] != record['Text']],
+        "removed": [dict(record, id=key) for key, record in old.items() if key not in new]
+    }
+
+
+def partition_path(site, root=CORPUS_DIR):
+    return os.path.join(root, f"site={site}", "part-0.parquet")
+
+
+def to_table(records, scraped_at=None):
+    """Typed table of records (dicts with Section, Link, Title and Text), with IDs and content hashes."""
+    rows = [{name: "" if record.get(name) is None else str(record[name]) for name in CSV_COLUMNS}
+            for record in records]
+    scraped_at = (scraped_at or datetime.now()).replace(microsecond=0)
+    return pa.table({
+        "id": record_ids(rows),
+        **{name: [row[name] for row in rows] for name in CSV_COLUMNS},
+        "content_hash": [hashlib.sha256(row["Text"].encode("utf-8")).hexdigest()[:16] for row in rows],
+        "scraped_at": [scraped_at] * len(rows)
+    }, schema=SCHEMA)
+
+
+def write_site(records, site, root=CORPUS_DIR, scraped_at=None, export_csv=True):
+    """
+    Writes the partition of a site (replacing the previous one) and its CSV export.
+    """
+    table = to_table(records, scraped_at)
+    path = partition_path(site, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_write(path, "wb") as file:
+        pq.write_table(table, file, compression="zstd")
+    if export_csv and site in SITE_CSV:
+        table.select(CSV_COLUMNS).to_pandas().to_csv(SITE_CSV[site], index=False)
+    return table
+
+
+def import_csv(site, root=CORPUS_DIR):
+    """Builds the partition of a site from its CSV export, e.g. for data scraped before the Parquet corpus."""
+    frame = pd.read_csv(SITE_CSV[site]).fillna("").astype(str)
+    scraped_at = datetime.fromtimestamp(os.path.getmtime(SITE_CSV[site]))
+    print(f"Importing {SITE_CSV[site]} into the corpus.")
+    return write_site(frame.to_dict("records"), site, root, scraped_at, export_csv=False)
+
+
+def read_site(site, root=CORPUS_DIR, columns=None):
+    """
+    Reads the partition of a site, memory-mapped. A site with only a CSV export is imported first;
+    a site with neither gives None.
+    """
+    path = partition_path(site, root)
+    if not os.path.exists(path):
+        if site not in SITE_CSV or not os.path.exists(SITE_CSV[site]):
+            return None
+        import_csv(site, root)
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def read_corpus(sites, root=CORPUS_DIR):
+    """The partitions of sites as one table, with a site column."""
+    tables = []
+    for site in sites:
+        table = read_site(site, root)
+        if table is None:
+            print(f"No corpus for {site}.")
+            continue
+        tables.append(table.append_column("site", pa.array([site] * table.num_rows, pa.string())))
+    if not tables:
+        return SCHEMA.empty_table().append_column("site", pa.array([], pa.string()))
+    return pa.concat_tables(tables)
+
+
+def validate(table, require_metadata=False):
+    """
+    Drops the records without text and, with require_metadata, without section, link or title.
+    Returns the valid records and the number of records dropped.
+    """
+    def present(name):
+        return pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(pc.fill_null(table[name], ""))), 0)
+
+    mask = present("Text")
+    if require_metadata:
+        for name in ("Section", "Link", "Title"):
+            mask = pc.and_(mask, present(name))
+    valid = table.filter(mask)
+    return valid, table.num_rows - valid.num_rows
+
+
+def fingerprint(table):
+    """Hash of the record IDs and content hashes of a table: changes only when the records change."""
+    digest = hashlib.sha256()
+    for name in ("id", "content_hash"):
+        digest.update("\x00".join(table[name].to_pylist()).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,170 @@
+# corpusnormalizer.py
+# Normalization stage between the extractors and the corpus: cleans the text of the records, drops
+# near-duplicate records of a section and strips the boilerplate lines repeated across the pages of a site.
+
+import hashlib
+import math
+import re
+import unicodedata
+
+# Typographic characters replaced by their ASCII equivalent, invisible ones deleted
+TRANSLATION = str.maketrans({
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'", "\u2032": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u2033": '"',
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2015": "-", "\u2212": "-",
+    "\u2022": "-", "\u00b7": "-",
+    "\u2026": "...",
+    "\u00a0": " ", "\u2009": " ", "\u202f": " ",
+    "\u00ad": None, "\u200b": None, "\u200c": None, "\u200d": None, "\u2060": None, "\ufeff": None
+})
+
+# Runs of horizontal whitespace
+SPACES = re.compile(r"[^\S\n]+")
+
+# Link texts ending a line, like the "Click me" lists of the Courses page
+CALL_TO_ACTION = re.compile(r"[ ,:;-]*\b(?:click (?:me|here)|read more|learn more)[.!]?[ ]*$", re.IGNORECASE | re.MULTILINE)
+
+# Characters kept by english_text: English letters, digits, whitespace and basic punctuation
+NON_ENGLISH = re.compile(r"[^A-Za-z0-9\s.,!?\"'():;-]+")
+
+# Minimum Jaccard similarity of the line shingles of two records of a section for the later one to be a near duplicate
+NEAR_DUPLICATE_SIMILARITY = 0.9
+
+# Consecutive lines per shingle; page start and end count as lines, so template lines at the top or
+# bottom of pages are caught even when the line next to them differs
+SHINGLE_LINES = 2
+
+# A shingle is boilerplate when it occurs on at least this many pages and this fraction of the site's pages
+BOILERPLATE_MIN_PAGES = 5
+BOILERPLATE_MIN_FRACTION = 0.2
+
+# Chunk size used to estimate the chunks removed (the general collection's, in tokens)
+ESTIMATE_CHUNK_TOKENS = 250
+
+PAGE_START = "\x02"
+PAGE_END = "\x03"
+
+
+def clean_text(text):
+    """
+    Unicode (NFKC) normalization, ASCII punctuation, single spaces and no call-to-action link texts
+    or blank lines.
+    """
+    text = SPACES.sub(" ", unicodedata.normalize("NFKC", text).translate(TRANSLATION))
+    text = CALL_TO_ACTION.sub("", text)
+    return "\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+def english_text(text):
+    """
+    Only English letters, digits and basic punctuation. Accented letters lose their accent
+    (NFKD) instead of being dropped.
+    """
+    text = unicodedata.normalize("NFKD", text).translate(TRANSLATION)
+    text = NON_ENGLISH.sub("", text)
+    return SPACES.sub(" ", text).strip()
+
+
+def line_hash(line):
+    return hashlib.blake2b(" ".join(line.lower().split()).encode("utf-8"), digest_size=8).digest()
+
+
+def line_shingles(lines):
+    """(shingle hash, indexes of its lines) of the lines, including the page start and end."""
+    hashes = [line_hash(PAGE_START)] + [line_hash(line) for line in lines] + [line_hash(PAGE_END)]
+    shingles = []
+    for start in range(len(hashes) - SHINGLE_LINES + 1):
+        digest = hashlib.blake2b(b"".join(hashes[start:start + SHINGLE_LINES]), digest_size=8).digest()
+        # Positions in lines, without the page start and end
+        members = [index - 1 for index in range(start, start + SHINGLE_LINES) if 0 < index <= len(lines)]
+        shingles.append((digest, members))
+    return shingles
+
+
+def dedupe_records(records):
+    """
+    Drops the records whose text duplicates, or nearly duplicates, the text of an earlier record of the
+    same Section, whatever their Link: the earlier record is the canonical one and keeps its link and
+    title. A page listed under several sections keeps a record in each, with its section label.
+    Candidates are found through the line shingles they share. Returns the kept records and the number
+    dropped.
+    """
+    kept, shingle_sets, seen_text = [], [], set()
+    by_shingle = {}
+    for record in records:
+        section = record["Section"]
+        text_key = (section, hashlib.sha256(record["Text"].encode("utf-8")).digest())
+        if text_key in seen_text:
+            continue
+        shingles = {digest for digest, _ in line_shingles(record["Text"].split("\n"))}
+        candidates = {index for digest in shingles for index in by_shingle.get((section, digest), ())}
+        if any(len(shingles & shingle_sets[index]) / len(shingles | shingle_sets[index]) >= NEAR_DUPLICATE_SIMILARITY
+               for index in candidates):
+            continue
+        seen_text.add(text_key)
+        for digest in shingles:
+            by_shingle.setdefault((section, digest), []).append(len(kept))
+        shingle_sets.append(shingles)
+        kept.append(record)
+    return kept, len(records) - len(kept)
+
+
+def strip_boilerplate(records):
+    """
+    Removes the lines covered by a shingle that repeats across the pages of the site. A page's records
+    (its main content and its sections) count once. Returns the records and the number of lines removed.
+    """
+    pages_per_shingle = {}
+    shingled = []
+    for record in records:
+        lines = record["Text"].split("\n")
+        shingles = line_shingles(lines)
+        shingled.append((lines, shingles))
+        for digest, _ in shingles:
+            pages_per_shingle.setdefault(digest, set()).add(record["Link"])
+
+    page_count = len({record["Link"] for record in records})
+    threshold = max(BOILERPLATE_MIN_PAGES, math.ceil(BOILERPLATE_MIN_FRACTION * page_count))
+    stripped, removed = [], 0
+    for record, (lines, shingles) in zip(records, shingled):
+        boilerplate = {member for digest, members in shingles
+                       if len(pages_per_shingle[digest]) >= threshold for member in members}
+        if boilerplate:
+            removed += len(boilerplate)
+            record = dict(record, Text="\n".join(line for index, line in enumerate(lines) if index not in boilerplate))
+        stripped.append(record)
+    return stripped, removed
+
+
+def estimate_chunks(records, chunk_tokens=ESTIMATE_CHUNK_TOKENS):
+    from chunking import count_tokens
+    return sum(math.ceil(count_tokens(record["Text"]) / chunk_tokens) for record in records if record["Text"])
+
+
+def normalize_records(records):
+    """
+    Runs the normalization stage over the records of one site. Returns the records and a report of
+    what was removed.
+    """
+    cleaned = [dict(record, Title=clean_text(record["Title"] or ""), Text=clean_text(record["Text"] or ""))
+               for record in records]
+    deduped, duplicates = dedupe_records(cleaned)
+    stripped, lines_removed = strip_boilerplate(deduped)
+    # Records left without text would only be skipped at ingest
+    normalized = [record for record in stripped if record["Text"]]
+
+    bytes_in = sum(len((record["Text"] or "").encode("utf-8")) for record in records)
+    bytes_out = sum(len(record["Text"].encode("utf-8")) for record in normalized)
+    chunks_in, chunks_out = estimate_chunks(records), estimate_chunks(normalized)
+    report = {
+        "records_in": len(records),
+        "records_out": len(normalized),
+        "duplicates_removed": duplicates,
+        "boilerplate_lines_removed": lines_removed,
+        "empty_removed": len(stripped) - len(normalized),
+        "bytes_removed": bytes_in - bytes_out,
+        "bytes_removed_pct": round(100 * (bytes_in - bytes_out) / bytes_in, 1) if bytes_in else 0.0,
+        "chunks_removed": chunks_in - chunks_out,
+        "chunks_out": chunks_out
+    }
+    return normalized, report
@@ -0,0 +1,179 @@
+# coursecatalog.py
+
+import re
+from collections import Counter
+from functools import lru_cache
+import pandas as pd
+
+# Scraped corpus holding one page per course
+COURSE_CATALOG_SOURCE = "Data/dil_scraped_data.csv"
+COURSES_SECTION = "Courses"
+
+# Course code at the start of a title or in user input: "DATA 601", "DATA601", "data-601"
+COURSE_CODE_PATTERN = re.compile(r"\b([A-Za-z]{2,5})\s*-?\s*(\d{3})\b")
+
+# Minimum trigram similarity of a fuzzy title match
+FUZZY_THRESHOLD = 0.5
+
+# Words left out of the initials of a title, so "Introduction to Natural Language Processing" gives "inlp"
+INITIALS_STOPWORDS = {"a", "an", "and", "for", "in", "of", "on", "the", "to", "with", "special", "topics"}
+
+# User input that may be an abbreviation of a title: "NLP", "AI", "ML"
+ABBREVIATION_PATTERN = re.compile(r"[a-z]{2,6}")
+
+
+def normalize_text(text):
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+def normalize_code(text):
+    """
+    Returns the canonical code ("data601") of the first course code in text, or None.
+    """
+    match = COURSE_CODE_PATTERN.search(str(text))
+    if match is None:
+        return None
+    return f"{match.group(1).lower()}{match.group(2)}"
+
+
+def initials(text):
+    return "".join(word[0] for word in text.split() if word not in INITIALS_STOPWORDS)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CourseCatalog:
+    """
+    Course titles of the scraped Courses section, compiled once into lookup tables:
+    code -> offerings (DATA 690 has several), normalized title -> title, the initials of each title
+    for abbreviations, and a trigram index for fuzzy matching.
+    """
+
+    def __init__(self, titles):
+        self.titles = list(dict.fromkeys(titles))
+        self._positions = {title: index for index, title in enumerate(self.titles)}
+        self.by_code = {}
+        self.by_name = {}
+        self._trigrams = {}
+        self._sizes = []
+        self._initials = []
+        for index, title in enumerate(self.titles):
+            code = normalize_code(title)
+            self.by_code.setdefault(code, []).append(title)
+            name = normalize_text(title)
+            # The title without its code, so "Introduction to Data Science" matches as well
+            topic = normalize_text(COURSE_CODE_PATTERN.sub("", title, count=1))
+            grams = trigrams(topic)
+            self.by_name[name] = title
+            self.by_name.setdefault(topic, title)
+            self._sizes.append(len(grams))
+            self._initials.append(initials(topic))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(index)
+        # Per-catalog cache of the resolved inputs, dropped with the catalog
+        self._resolve = lru_cache(maxsize=1024)(self._resolve_text)
+
+    @classmethod
+    def from_csv(cls, path=COURSE_CATALOG_SOURCE):
+        """
+        Builds the catalog from the course pages (titles starting with a course code) of a scraped CSV.
+        """
+        frame = pd.read_csv(path, usecols=["Section", "Title"])
+        titles = frame.loc[frame["Section"] == COURSES_SECTION, "Title"].dropna().astype(str).str.strip()
+        return cls(title for title in titles if COURSE_CODE_PATTERN.match(title))
+
+    def fuzzy_match(self, text, candidates=None):
+        """
+        Returns the title whose topic shares the most trigrams with text (Dice coefficient), or None.
+        candidates: restrict the match to these titles.
+        """
+        grams = trigrams(normalize_text(text))
+        if not grams:
+            return None
+        allowed = None if candidates is None else {self._positions[title] for title in candidates}
+        shared = Counter(
+            index for gram in grams for index in self._trigrams.get(gram, ())
+            if allowed is None or index in allowed
+        )
+        best, best_score = None, FUZZY_THRESHOLD
+        for index, count in shared.items():
+            score = 2 * count / (len(grams) + self._sizes[index])
+            if score >= best_score:
+                best, best_score = self.titles[index], score
+        return best
+
+    def abbreviation_match(self, text, candidates):
+        """
+        Returns the candidate titles whose initials contain the abbreviation text ("nlp", "ai").
+        """
+        if not ABBREVIATION_PATTERN.fullmatch(text):
+            return []
+        return [title for title in candidates if text in self._initials[self._positions[title]]]
+
+    def resolve(self, course_input):
+        """
+        Returns the titles of all courses matching a course code or name, most specific first.
+        "DATA 690" returns every DATA 690 offering, "DATA 690 NLP" the offerings whose title the
+        abbreviation stands for, "DATA 690 financial" the closest title.
+
+        >>> catalog = CourseCatalog([
+        ...     "DATA 690 Special Topics: Introduction to Natural Language Processing",
+        ...     "DATA 690 Special Topics: Artificial Intelligence for Practitioners",
+        ...     "DATA 690 Financial Data Science"
+        ... ])
+        >>> catalog.resolve("DATA 690 NLP")
+        ['DATA 690 Special Topics: Introduction to Natural Language Processing']
+        >>> catalog.resolve("data 690 financial")
+        ['DATA 690 Financial Data Science']
+        """
+        return list(self._resolve(normalize_text(course_input)))
+
+    def _resolve_text(self, text):
+        if not text:
+            return ()
+        title = self.by_name.get(text)
+        if title is not None:
+            return (title,)
+        code = normalize_code(text)
+        offerings = self.by_code.get(code)
+        if offerings:
+            rest = COURSE_CODE_PATTERN.sub("", text, count=1).strip()
+            if rest and len(offerings) > 1:
+                titles = self.abbreviation_match(rest, offerings)
+                if titles:
+                    return tuple(titles)
+                title = self.fuzzy_match(rest, offerings)
+                if title is not None:
+                    return (title,)
+            return tuple(offerings)
+        title = self.fuzzy_match(text)
+        return (title,) if title is not None else ()
+
+    def resolve_all(self, course_inputs):
+        """
+        Resolves all Course_name parameters in one pass, keeping the first occurrence of each title.
+        """
+        if isinstance(course_inputs, str):
+            course_inputs = [course_inputs]
+        titles = {}
+        for course_input in course_inputs:
+            for title in self.resolve(course_input):
+                titles.setdefault(title, None)
+        return list(titles)
+
+    def __len__(self):
+        return len(self.titles)
+
+
+@lru_cache(maxsize=None)
+def load_course_catalog(path=COURSE_CATALOG_SOURCE):
+    try:
+        catalog = CourseCatalog.from_csv(path)
+    except (OSError, ValueError) as e:
+        print(f"Could not load the course catalog from {path}: {e}")
+        return CourseCatalog([])
+    print(f"Loaded {len(catalog)} courses from {path}.")
+    return catalog
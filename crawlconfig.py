@@ -0,0 +1,66 @@
+# crawlconfig.py
+# The sites scraped into the corpus. Each page is a seed of its site's crawl: its section names the
+# records, its kind names the extractor (extractors.HANDLERS) and internal_host limits the links
+# followed from section pages to that host.
+
+# Main sections of the Data Science program site
+sections = {
+    "Courses": 'https://dil.umbc.edu/courses/',
+    "Pathways & Certificates": 'https://dil.umbc.edu/pathways-and-certificates/',
+    "Advising & Resources": 'https://dil.umbc.edu/resources/',
+    "Policies": 'https://dil.umbc.edu/policies/',
+    "Prospective Students": 'https://dil.umbc.edu/prospective-students/',
+    "Faculty": 'https://dil.umbc.edu/faculty/'
+}
+
+# F-1 Students sub-sections of the ISSS site
+sub_sections = {
+    "Current Students: General": "https://isss.umbc.edu/international-students-f-1/current-students/",
+    "Current Students: Employment": "https://isss.umbc.edu/f-1-students/current-students-employment/",
+    "Working On-Campus": "https://isss.umbc.edu/international-students-f-1/current-students-employment/working-on-campus/",
+    "Economoic Hardship Work Authorization": "https://isss.umbc.edu/international-students-f-1/current-students-employment/economic-hardship-work-authorization/",
+    "Understanding Your Documents": "https://isss.umbc.edu/f-1-students/understanding-your-documents/",
+    "Social Security Number (SSN)": "https://isss.umbc.edu/f-1-students/social-security-number/",
+    "US Taxes": "https://isss.umbc.edu/international-students-f-1/current-students/understanding-your-tax-documents/",
+    "Applying for a Maryland Driver’s License & Getting a State ID": "https://isss.umbc.edu/resources/transportation/driving-in-maryland-and-getting-a-state-id/",
+    "Change of Immigration Status": "https://isss.umbc.edu/change-of-status/"
+}
+
+# Pages with dropdowns (questions and answers)
+dropdown_pages = {
+    "Internships and International Students": "https://dil.umbc.edu/resources/internships-and-international-students/",
+    "OPT and OPT STEM Information": "https://isss.umbc.edu/opt-and-opt-stem-information/",
+    "Working Off-Campus": "https://isss.umbc.edu/international-students-f-1/current-students-employment/working-off-campus/"
+}
+
+# Research pages of the CSEE department, the AI institute and the cybersecurity labs
+Research_links = {
+    "CSEE Research Areas": "https://www.csee.umbc.edu/csee-research-areas/",
+    "Research Centers": "https://www.csee.umbc.edu/research-focus-areas-and-centers/",
+    "Research Labs CSEE": "https://www.csee.umbc.edu/research/research-labs/",
+    "AI Home": "https://ai.umbc.edu/",
+    "Research faculty": "https://ai.umbc.edu/ai-faculty/",
+    "Research Labs AI": "https://ai.umbc.edu/labs-groups/",
+    "Cyber Security labs": "https://cybersecurity.umbc.edu/training/labs/"
+}
+
+SITES = {
+    "dil.umbc.edu": {
+        "internal_host": "dil.umbc.edu",
+        # The Courses page is crawled recursively, the other sections with their internal and sidebar links
+        "pages": [
+            {"section": name, "url": url, "kind": "courses" if name == "Courses" else "section"}
+            for name, url in sections.items()
+        ]
+    },
+    "isss.umbc.edu": {
+        "internal_host": None,
+        "pages": [{"section": name, "url": url, "kind": "notitle"} for name, url in sub_sections.items()]
+        + [{"section": name, "url": url, "kind": "dropdown"} for name, url in dropdown_pages.items()]
+    },
+    "research": {
+        # Internal links are only followed on dil.umbc.edu
+        "internal_host": "dil.umbc.edu",
+        "pages": [{"section": name, "url": url, "kind": "section"} for name, url in Research_links.items()]
+    }
+}
@@ -0,0 +1,329 @@
+# crawler.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import urldefrag, urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from metrics import metrics
+from pagecache import cache_key, content_hash
+
+USER_AGENT = "RetrieverBot-Crawler/1.0 (+https://github.com/SuryaTejaswi1/RetrieverBot_Capstone)"
+
+# Block elements after which the extracted text gets a line break, like the browser's innerText
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "noscript", "ol", "p", "pre",
+    "section", "table", "td", "th", "tr", "ul"
+}
+
+# Elements whose content the browser does not render
+HIDDEN_TAGS = ["script", "style", "noscript", "template"]
+
+
+def normalize_url(url):
+    """Drops the fragment, so page.html#part and page.html are crawled once."""
+    return urldefrag(url.strip())[0]
+
+
+def element_text(element):
+    """
+    Text of an element with one line per block element and no blank lines. Like the browser's innerText,
+    the content of scripts, styles, noscript and template elements is left out.
+    """
+    if element is None:
+        return ""
+    for tag in element.find_all(HIDDEN_TAGS):
+        tag.decompose()
+    for tag in element.find_all(BLOCK_TAGS):
+        tag.insert_after("\n")
+    lines = (" ".join(line.split()) for line in element.get_text().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class Request:
+    """
+    A page to crawl: kind names the handler that extracts it, context is passed to the handler.
+    """
+
+    def __init__(self, url, kind, context=None, depth=1):
+        self.url = normalize_url(url)
+        self.kind = kind
+        self.context = context or {}
+        self.depth = depth
+        self.order = ()
+
+
+class Page:
+    def __init__(self, url, status, html, headers=None, elapsed=0.0):
+        self.url = url
+        self.status = status
+        self.html = html
+        self.headers = headers or {}
+        self.elapsed = elapsed
+        self._soup = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "html.parser")
+        return self._soup
+
+
+class HostPoliteness:
+    """
+    Limits the concurrent requests per host and spaces out the requests to a host by min_delay seconds.
+    """
+
+    def __init__(self, per_host=2, min_delay=0.25):
+        self.per_host = per_host
+        self.min_delay = min_delay
+        self._semaphores = {}
+        self._locks = {}
+        self._next_start = {}
+
+    @asynccontextmanager
+    async def slot(self, host):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                delay = self._next_start.get(host, 0.0) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._next_start[host] = time.monotonic() + self.min_delay
+            yield
+
+
+class HttpFetcher:
+    """
+    Fetches static pages with one pooled async HTTP client.
+    """
+
+    def __init__(self, timeout=15.0, retries=2, client=None):
+        self.retries = retries
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+
+    async def fetch(self, url, headers=None):
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            if response.status_code >= 500 and attempt < self.retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            return Page(str(response.url), response.status_code, response.text, dict(response.headers),
+                        time.perf_counter() - start)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class SeleniumFetcher:
+    """
+    Fetches pages that need JavaScript with a pool of headless Chrome drivers, each used by one thread
+    at a time. Waits explicitly for wait_for_class instead of sleeping a fixed time.
+    """
+
+    def __init__(self, drivers=2, wait_for_class="main-content", timeout=10, chromedriver_path=None):
+        self.wait_for_class = wait_for_class
+        self.timeout = timeout
+        self.chromedriver_path = chromedriver_path
+        self._executor = ThreadPoolExecutor(max_workers=drivers, thread_name_prefix="chrome")
+        # One slot per driver: a fetch holding a slot takes an idle driver or creates one, so no more
+        # than drivers exist and a failed creation frees its slot for the next fetch
+        self._slots = asyncio.Semaphore(drivers)
+        self._idle = []
+
+    def _new_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        # Without a path, Selenium Manager finds (or downloads) a matching chromedriver
+        service = Service(executable_path=self.chromedriver_path) if self.chromedriver_path else Service()
+        return webdriver.Chrome(service=service, options=options)
+
+    def _load(self, driver, url):
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        start = time.perf_counter()
+        driver.get(url)
+        try:
+            WebDriverWait(driver, self.timeout).until(
+                EC.presence_of_element_located((By.CLASS_NAME, self.wait_for_class))
+            )
+        except TimeoutException:
+            pass
+        return Page(driver.current_url, 200, driver.page_source, elapsed=time.perf_counter() - start)
+
+    async def fetch(self, url, headers=None):
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            if self._idle:
+                driver = self._idle.pop()
+            else:
+                # Raises when Chrome cannot start; the crawler records the page as failed
+                driver = await loop.run_in_executor(self._executor, self._new_driver)
+            try:
+                return await loop.run_in_executor(self._executor, self._load, driver, url)
+            finally:
+                self._idle.append(driver)
+
+    async def close(self):
+        while self._idle:
+            driver = self._idle.pop()
+            await asyncio.get_running_loop().run_in_executor(self._executor, driver.quit)
+        self._executor.shutdown(wait=False)
+
+
+class Crawler:
+    """
+    Crawls from seed requests with a pool of workers sharing one frontier.
+    handlers maps a request kind to handler(page, request) -> (records, follow-up requests).
+    Every URL is fetched once; records are returned in discovery order, whatever the fetch order was.
+
+    With a page cache, the crawl is incremental: pages are requested conditionally and a page that is
+    not modified (HTTP 304) or whose content hash did not change is not extracted again, its cached
+    records and follow-up requests are used. A page that cannot be fetched or extracted (a transport
+    error, an HTTP error other than 404/410, an extractor error) keeps its cached records and links.
+    With full, every page is requested and extracted again and the cache is refreshed with the results.
+    """
+
+    def __init__(self, handlers, fetcher=None, workers=8, politeness=None, cache=None, full=False):
+        self.handlers = handlers
+        self.fetcher = fetcher or HttpFetcher()
+        self.workers = workers
+        self.politeness = politeness or HostPoliteness()
+        self.cache = cache
+        self.full = full
+        # Keys of the cached pages reached by the last crawl
+        self.visited = set()
+        self.stats = {"fetched": 0, "skipped": 0, "stale": 0, "errors": 0, "records": 0, "seconds": 0.0}
+
+    async def crawl(self, seeds):
+        queue = asyncio.Queue()
+        seen = set()
+        results = []
+
+        def enqueue(request, order):
+            if request.url in seen or urlparse(request.url).scheme not in ("http", "https"):
+                return
+            seen.add(request.url)
+            request.order = order
+            queue.put_nowait(request)
+
+        for index, request in enumerate(seeds):
+            enqueue(request, (index,))
+
+        async def worker():
+            while True:
+                request = await queue.get()
+                try:
+                    await self._visit(request, results, enqueue)
+                except Exception as e:
+                    # A failing page must not stop the worker, or queue.join() would never return
+                    print(f"Error crawling {request.url}: {e}")
+                    self.stats["errors"] += 1
+                    metrics.incr("crawler_errors")
+                finally:
+                    queue.task_done()
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        try:
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        results.sort(key=lambda item: item[0])
+        records = [record for _, record in results]
+        self.stats["records"] = len(records)
+        return records
+
+    async def _visit(self, request, results, enqueue):
+        key = cache_key(request, self.cache.version if self.cache is not None else "")
+        cached = self.cache.get(key) if self.cache is not None else None
+        # A full crawl does not reuse the cached records of a page it could fetch
+        current = cached if not self.full else None
+        try:
+            async with self.politeness.slot(urlparse(request.url).netloc):
+                page = await self.fetcher.fetch(request.url, current.conditional_headers() if current else None)
+        except Exception as e:
+            print(f"Error fetching {request.url}: {e}")
+            self.stats["errors"] += 1
+            metrics.incr("crawler_errors")
+            if cached is not None:
+                self.stats["stale"] += 1
+                self._emit(request, key, cached.records, cached.follow, results, enqueue)
+            return
+        metrics.observe("crawler_fetch", page.elapsed)
+        if page.status == 304 and current is not None:
+            self.stats["skipped"] += 1
+            metrics.incr("crawler_pages_skipped")
+            self._emit(request, key, cached.records, cached.follow, results, enqueue)
+            return
+        # Login walls (401/403) are still passed to the handler, which records them
+        if page.status >= 400 and page.status not in (401, 403):
+            print(f"Error fetching {request.url}: HTTP {page.status}")
+            self.stats["errors"] += 1
+            metrics.incr("crawler_errors")
+            # Like a transport error, unless the page is gone
+            if cached is not None and page.status not in (404, 410):
+                self.stats["stale"] += 1
+                self._emit(request, key, cached.records, cached.follow, results, enqueue)
+            return
+        digest = content_hash(page.html)
+        if current is not None and current.content_hash == digest:
+            # Served again without validators, or the server ignores them: same content, same records
+            self.cache.refresh(key, page.headers)
+            self.stats["skipped"] += 1
+            metrics.incr("crawler_pages_skipped")
+            self._emit(request, key, cached.records, cached.follow, results, enqueue)
+            return
+        self.stats["fetched"] += 1
+        metrics.incr("crawler_pages_fetched")
+        try:
+            records, follow = self.handlers[request.kind](page, request)
+        except Exception as e:
+            print(f"Error extracting {request.url}: {e}")
+            self.stats["errors"] += 1
+            if cached is not None:
+                self.stats["stale"] += 1
+                self._emit(request, key, cached.records, cached.follow, results, enqueue)
+            return
+        follow = [(child.url, child.kind, child.context, child.depth) for child in follow]
+        if self.cache is not None:
+            self.cache.put(key, request.url, page.headers, digest, records, follow)
+        self._emit(request, key, records, follow, results, enqueue)
+
+    def _emit(self, request, key, records, follow, results, enqueue):
+        self.visited.add(key)
+        for position, record in enumerate(records):
+            results.append((request.order + (0, position), record))
+        for position, (url, kind, context, depth) in enumerate(follow):
+            enqueue(Request(url, kind, context, depth), request.order + (1, position))
+
+    async def close(self):
+        await self.fetcher.close()
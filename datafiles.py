@@ -0,0 +1,67 @@
+# datafiles.py
+# Files written by the offline scripts (scrape.py, embeddings.py, feedbackanalytics.py) and read by
+# the running server: atomic writes, and polling for a newer version of a file.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds between two checks of a watched file for a newer version
+RELOAD_CHECK_INTERVAL = 5.0
+
+
+@contextmanager
+def atomic_write(path, mode="w"):
+    """
+    Opens a temporary file next to path and replaces path with it once the block succeeded, so readers
+    see either the old or the new file, never a partial one.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode) as file:
+            yield file
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_version(path):
+    """(modification time, size) of path, or None when it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """
+    Polls the version of files at most once per interval. changed() is true once per change, for one
+    caller only, so a file is reloaded once even when several threads poll it.
+    The version at construction counts as seen: load the files after creating the watcher.
+    """
+
+    def __init__(self, paths, interval=None):
+        self.paths = list(paths)
+        self.interval = RELOAD_CHECK_INTERVAL if interval is None else interval
+        self._version = self._read()
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _read(self):
+        return [file_version(path) for path in self.paths]
+
+    def changed(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < self.interval:
+                return False
+            self._checked = now
+            version = self._read()
+            if version == self._version:
+                return False
+            self._version = version
+            return True
@@ -0,0 +1,154 @@
+# embeddingcache.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Default location of the embedding cache shared by embeddings.py and the server
+EMBEDDING_CACHE_PATH = "embedding_cache.db"
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic local embeddings: word unigrams and bigrams are hashed into a fixed number of
+    signed buckets and the vector is L2 normalized. Needs no network, so ingest, tests and
+    benchmarks can run offline.
+    """
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+        self.model_name = f"hashing-{dimensions}"
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model with a persistent cache keyed by (model, text hash).
+    Vectors are stored as float32 blobs in SQLite; recent query vectors are also kept in memory.
+    """
+
+    def __init__(self, embeddings, model_name, cache_path=EMBEDDING_CACHE_PATH, memory_size=2048):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, hashes):
+        found = {}
+        with self._lock:
+            # SQLite limits the number of parameters per statement
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [self.model_name, *batch]
+                ).fetchall()
+                for hash_value, blob in rows:
+                    found[hash_value] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _store(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(self.model_name, hash_value, np.asarray(vector, dtype=np.float32).tobytes()) for hash_value, vector in items]
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        found = self._load(list(set(hashes)))
+        missing = {hash_value: text for hash_value, text in zip(hashes, texts) if hash_value not in found}
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self._store(new_items)
+            found.update(new_items)
+        return [found[hash_value] for hash_value in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        hash_value = text_hash(text)
+        with self._lock:
+            vector = self._memory.get(hash_value)
+            if vector is not None:
+                self._memory.move_to_end(hash_value)
+                self.hits += 1
+                return vector
+        vector = self._load([hash_value]).get(hash_value)
+        if vector is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            vector = self.embeddings.embed_query(text)
+            self._store([(hash_value, vector)])
+        with self._lock:
+            self._memory[hash_value] = vector
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+        return vector
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def load_embedding_model(backend=None, cache_path=None):
+    """
+    Returns the cached embedding model selected by EMBEDDING_BACKEND ("openai" or "hashing").
+    The Chroma stores must be queried with the same backend they were built with.
+    """
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "openai")
+    cache_path = cache_path or os.getenv("EMBEDDING_CACHE_PATH", EMBEDDING_CACHE_PATH)
+    if backend == "hashing":
+        embeddings = HashingEmbeddings(int(os.getenv("EMBEDDING_DIMENSIONS", "384")))
+        model_name = embeddings.model_name
+    elif backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings(model=OPENAI_EMBEDDING_MODEL)
+        model_name = OPENAI_EMBEDDING_MODEL
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    return CachedEmbeddings(embeddings, model_name, cache_path)
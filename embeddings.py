@@ -5,94 +5,258 @@
 
 
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_openai import OpenAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+import hashlib
+import json
 import os
+import random
+import sys
+import time
+import openai
+from answercache import mark_corpus_updated
+from chunking import count_tokens, split_rows
+from corpus import CSV_COLUMNS, fingerprint, read_corpus, validate
+from datafiles import atomic_write
+from embeddingcache import load_embedding_model
+from freshness import record_ingest
+from lexicalindex import BM25Index, LEXICAL_INDEX_FILE
+from syllabusindex import SYLLABUS_INDEX_FILE, build_course_index, save_course_index
 
 # Load the .env file
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("openai_api_key")
 
+# Corpus sites of each collection
+GENERAL_SITES = ['dil.umbc.edu', 'isss.umbc.edu']
+RESEARCH_SITES = ['research']
 
-# Reading the CSV files into pandas DataFrames
-df_dil = pd.read_csv('Data/dil_scraped_data.csv')
-df_isss = pd.read_csv('Data/isss_scraped_data.csv')
-df_csee = pd.read_csv('Data/research_data.csv')
-
-data = pd.concat([df_dil, df_isss], ignore_index=True)
-# Ensure the 'Text' column contains strings and handle missing values
-data["Text"] = data["Text"].fillna("").astype(str)
-
-# Initialize text splitter and embedding model
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-embedding_model = OpenAIEmbeddings(model="text-embedding-ada-002")
-
-# Initialize Chroma with persistence
-persist_directory = "chroma_store"
-chroma_store = Chroma(
-    collection_name="retriever_bot",
-    embedding_function=embedding_model,
-    persist_directory=persist_directory
-)
-
-# Process each row in the dataset
-for idx, row in data.iterrows():
-    # Validate metadata fields
-    if not (row["Section"] and row["Link"] and row["Title"]):
-        print(f"Skipping row {idx} due to missing metadata.")
-        continue
-
-    # Split the text into chunks and filter out empty chunks
-    chunks = [chunk for chunk in text_splitter.split_text(row["Text"]) if chunk.strip()]
-    if not chunks:
-        print(f"No valid chunks for row {idx}, skipping.")
-        continue
-
-    # Prepare metadata
-    metadata = {
-        "section": row["Section"],
-        "link": row["Link"],
-        "title": row["Title"]
-    }
-
-    # Add chunks to Chroma
+# Chunking settings of each collection, in tokens (part of the source hash, so changing them re-indexes the collection).
+# Research pages are long, so they get larger chunks instead of being stored whole.
+GENERAL_SETTINGS = {"chunk_size": 250, "chunk_overlap": 25, "require_metadata": True}
+RESEARCH_SETTINGS = {"chunk_size": 400, "chunk_overlap": 50, "require_metadata": False}
+
+# Manifest of the chunks stored in each persisted Chroma collection
+MANIFEST_FILE = "ingest_manifest.json"
+
+# Ingest pipeline settings
+READ_CHUNK_ROWS = 100  # corpus records split per task
+INGEST_PROCESSES = int(os.getenv("INGEST_PROCESSES", str(os.cpu_count() or 1)))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))  # concurrent embedding requests
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "20000"))  # token budget per embedding request
+EMBED_BATCH_SIZE = 256  # maximum chunks per embedding request
+WRITE_BATCH_SIZE = 1000  # chunks per Chroma write
+MAX_RETRIES = 6
+
+
+def hash_sources(table, settings):
+    """Hash the corpus records and the chunking settings of a collection."""
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    digest.update(fingerprint(table).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest(persist_directory):
     try:
-        chroma_store.add_texts(texts=chunks, metadatas=[metadata] * len(chunks))
-    except Exception as e:
-        print(f"Error adding texts for row {idx}: {e}")
-
-
-# Initialize another persistent directory
-persist_directory_research = "chroma_store1"
-
-# Initialize Chroma with persistence for research data
-chroma_store1 = Chroma(
-    collection_name="research_info",
-    embedding_function=embedding_model,
-    persist_directory=persist_directory_research
-)
-
-# Process each row in the dataset for research info
-for idx, row in df_csee.iterrows():
-    # Prepare metadata with Section, Link, and Title
-    metadata = {
-        "section": row["Section"],
-        "link": row["Link"],
-        "title": row["Title"]
-    }
-
-    # Add full text with metadata to Chroma without chunking
-    chroma_store1.add_texts(
-        texts=[row["Text"]],
-        metadatas=[metadata]
-    )
+        with open(os.path.join(persist_directory, MANIFEST_FILE)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(persist_directory, manifest):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    with atomic_write(path) as file:
+        json.dump(manifest, file)
+
+
+def read_rows(table):
+    """Read the corpus records in chunks of rows, as lists of dicts."""
+    table = table.select(CSV_COLUMNS)
+    for start in range(0, table.num_rows, READ_CHUNK_ROWS):
+        yield table.slice(start, READ_CHUNK_ROWS).to_pylist()
+
+
+def split_sources(table, settings, pool):
+    """Split the corpus records into chunks in the process pool, keyed by chunk ID."""
+    futures = [pool.submit(split_rows, rows, settings) for rows in read_rows(table)]
+    chunks = {}
+    for future in futures:
+        for chunk, text, metadata in future.result():
+            chunks[chunk] = (text, metadata)
+    return chunks
+
+
+def pack_batches(items):
+    """Group (chunk ID, text, metadata) items into embedding requests within the token budget."""
+    batch, batch_tokens = [], 0
+    for item in items:
+        tokens = count_tokens(item[1])
+        if batch and (batch_tokens + tokens > EMBED_BATCH_TOKENS or len(batch) >= EMBED_BATCH_SIZE):
+            yield batch, batch_tokens
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch, batch_tokens
+
 
+def embed_with_backoff(embedding_model, texts):
+    """Embed texts, retrying with exponential backoff and jitter when rate limited."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return embedding_model.embed_documents(texts)
+        except openai.RateLimitError as e:
+            delay = min(2 ** attempt, 60) + random.uniform(0, 1)
+            print(f"Rate limited ({e}), retrying in {delay:.1f}s.")
+            time.sleep(delay)
+    return embedding_model.embed_documents(texts)
 
 
+def write_chunks(chroma_store, items, vectors):
+    """Bulk upsert chunks with their precomputed embeddings."""
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        batch = items[start:start + WRITE_BATCH_SIZE]
+        chroma_store._collection.upsert(
+            ids=[chunk for chunk, _, _ in batch],
+            documents=[text for _, text, _ in batch],
+            metadatas=[metadata for _, _, metadata in batch],
+            embeddings=vectors[start:start + WRITE_BATCH_SIZE]
+        )
+
+
+def embed_and_write(chroma_store, embedding_model, items):
+    """
+    Embed the items in token-budgeted batches sent concurrently and write them to Chroma as they complete.
+    Returns the number of chunks and tokens embedded.
+    """
+    chunk_count = token_count = 0
+    pending_items, pending_vectors = [], []
+    with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as executor:
+        futures = {
+            executor.submit(embed_with_backoff, embedding_model, [text for _, text, _ in batch]): (batch, tokens)
+            for batch, tokens in pack_batches(items)
+        }
+        for future in as_completed(futures):
+            batch, tokens = futures[future]
+            pending_items.extend(batch)
+            pending_vectors.extend(future.result())
+            chunk_count += len(batch)
+            token_count += tokens
+            if len(pending_items) >= WRITE_BATCH_SIZE:
+                write_chunks(chroma_store, pending_items, pending_vectors)
+                pending_items, pending_vectors = [], []
+    if pending_items:
+        write_chunks(chroma_store, pending_items, pending_vectors)
+    return chunk_count, token_count
+
+
+def build_indexes(persist_directory, chunks, course_index):
+    """Rebuild the lookup indexes saved next to the collection from its chunks."""
+    # BM25 index over the same chunks for hybrid retrieval
+    BM25Index.build(chunks).save(persist_directory)
+    if course_index:
+        # Course -> chunk IDs index for direct syllabus lookups
+        save_course_index(persist_directory, build_course_index(chunks))
+
+
+def sync_collection(chroma_store, persist_directory, chunks, source_hash, embedding_model, course_index=False):
+    """
+    Bring the collection in line with chunks: add new chunk IDs and delete the ones that disappeared.
+    A collection without manifest (built by an older, append-only run) is rebuilt from scratch.
+    Raises when the new chunks cannot be embedded; the manifest is then left as it was, so the next
+    run retries.
+    """
+    manifest = load_manifest(persist_directory)
+    if manifest is None:
+        if chroma_store.get(limit=1, include=[])["ids"]:
+            print(f"No ingest manifest in {persist_directory}, rebuilding the collection.")
+            chroma_store.reset_collection()
+        stored_ids = set()
+    else:
+        stored_ids = {chunk for ids in manifest["chunks"].values() for chunk in ids}
+
+    to_add = [chunk for chunk in chunks if chunk not in stored_ids]
+    to_delete = [chunk for chunk in stored_ids if chunk not in chunks]
+
+    if to_delete:
+        chroma_store.delete(ids=to_delete)
+    if to_add:
+        # Chunks are upserted, so re-running after an interruption is safe
+        start = time.perf_counter()
+        try:
+            chunk_count, token_count = embed_and_write(
+                chroma_store, embedding_model, [(chunk, *chunks[chunk]) for chunk in to_add]
+            )
+        except Exception as e:
+            print(f"Error adding texts to {persist_directory}: {e}")
+            if to_delete:
+                # The deleted chunks are gone already: answers cached from them must not be served
+                mark_corpus_updated(persist_directory)
+            raise
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"{persist_directory}: embedded {chunk_count} chunks ({token_count} tokens) in {elapsed:.1f}s, "
+              f"{chunk_count / elapsed:.1f} chunks/sec, {token_count / elapsed:.0f} tokens/sec.")
+
+    # Record which (link, chunk) pairs are stored
+    stored = {}
+    for chunk, (_, metadata) in chunks.items():
+        stored.setdefault(metadata["link"], []).append(chunk)
+    save_manifest(persist_directory, {"source_hash": source_hash, "chunks": stored})
+    build_indexes(persist_directory, chunks, course_index)
+    print(f"{persist_directory}: {len(to_add)} chunks added, {len(to_delete)} chunks deleted, {len(chunks)} total.")
+
+    if to_add or to_delete:
+        # Invalidate the answer caches of running servers
+        mark_corpus_updated(persist_directory)
+
+
+def ingest(collection_name, persist_directory, sites, settings, embedding_model, pool, course_index=False):
+    """Ingest one collection, doing nothing when its records and settings did not change."""
+    # Memory-mapped read of the sites' partitions, filtered in one vectorized pass
+    table, dropped = validate(read_corpus(sites), settings.get("require_metadata"))
+    if dropped:
+        print(f"{persist_directory}: skipped {dropped} records without text or metadata.")
+    source_hash = hash_sources(table, dict(settings, model=embedding_model.model_name))
+    manifest = load_manifest(persist_directory)
+    index_files = [LEXICAL_INDEX_FILE] + ([SYLLABUS_INDEX_FILE] if course_index else [])
+    indexes_exist = all(os.path.exists(os.path.join(persist_directory, name)) for name in index_files)
+    if manifest is not None and manifest.get("source_hash") == source_hash and indexes_exist:
+        print(f"{persist_directory}: sources unchanged, nothing to do.")
+        return
+
+    # Initialize Chroma with persistence
+    chroma_store = Chroma(
+        collection_name=collection_name,
+        embedding_function=embedding_model,
+        persist_directory=persist_directory
+    )
+    chunks = split_sources(table, settings, pool)
+    # Raises when the collection could not be updated, so no ingest is recorded for it
+    sync_collection(chroma_store, persist_directory, chunks, source_hash, embedding_model, course_index)
+    # Publish the ingest time and corpus version for the server's welcome message
+    record_ingest(persist_directory, source_hash)
+
 
+if __name__ == "__main__":
+    # Initialize the embedding model (cached, so unchanged chunks are not embedded again)
+    embedding_model = load_embedding_model()
 
+    failed = []
+    with ProcessPoolExecutor(max_workers=INGEST_PROCESSES) as pool:
+        for collection_name, persist_directory, sites, settings, course_index in (
+            ("retriever_bot", "chroma_store", GENERAL_SITES, GENERAL_SETTINGS, True),
+            ("research_info", "chroma_store1", RESEARCH_SITES, RESEARCH_SETTINGS, False)
+        ):
+            # A failed collection does not stop the other one
+            try:
+                ingest(collection_name, persist_directory, sites, settings, embedding_model, pool, course_index)
+            except Exception as e:
+                print(f"Ingest of {persist_directory} failed: {e}")
+                failed.append(persist_directory)
 
+    print(f"Embedding cache: {embedding_model.stats()}")
+    if failed:
+        sys.exit(f"Ingest failed for {', '.join(failed)}.")
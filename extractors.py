@@ -0,0 +1,215 @@
+# extractors.py
+# Extract corpus records (Section, Link, Title, Text) from the parsed HTML of the UMBC pages.
+# The handlers at the end are used by the crawler: handler(page, request) -> (records, follow-up requests).
+
+import hashlib
+from urllib.parse import urljoin
+import corpusnormalizer
+import crawler
+from corpusnormalizer import english_text
+from crawler import Request, element_text
+
+
+# Function to check if a page requires login or special access
+def requires_login_or_access_denied(page):
+    page_source = page.html.lower()
+    login_indicators = [
+        "login",
+        "access denied",
+        "restricted access",
+        "please sign in",
+        "requires login",
+        "permission required",
+        "sign in to continue"
+    ]
+    return any(indicator in page_source for indicator in login_indicators)
+
+
+def find_main_content(page):
+    main_content = page.soup.find(class_='main-content')
+    if main_content is None:
+        raise ValueError("no main-content element")
+    return main_content
+
+
+def links_in(element, base_url, host=None):
+    """Absolute links of the anchors in element, optionally only those to host."""
+    links = [urljoin(base_url, anchor['href']) for anchor in element.find_all('a', href=True)]
+    return [link for link in links if host is None or host in link]
+
+
+# Links within the "Courses" section are followed up to a certain depth
+def scrape_courses_section(page, request, max_depth=3):
+    """Extract a page of a section and follow the links in its content up to max_depth."""
+    section_name = request.context['section']
+
+    # Check if the page requires login or special access
+    if requires_login_or_access_denied(page):
+        print(f"Restricted access: {page.url} requires login.")
+        return [{
+            'Section': section_name,
+            'Link': request.url,
+            'Title': 'Login Required',
+            'Text': 'Requires login to access this content.'
+        }], []
+
+    main_content_element = find_main_content(page)
+
+    # Extract the title and content
+    title = english_text(element_text(main_content_element.find(class_='entry-header')))
+    content_element = main_content_element.find(class_='entry-content')
+    content = english_text(element_text(content_element))
+
+    record = {
+        'Section': section_name,
+        'Link': request.url,
+        'Title': title,
+        'Text': content
+    }
+
+    # Follow every link in the 'entry-content' div, increasing depth (no need to go back to this page)
+    follow = []
+    if request.depth < max_depth and content_element is not None:
+        follow = [
+            Request(link, 'courses', request.context, request.depth + 1)
+            for link in links_in(content_element, page.url)
+        ]
+    return [record], follow
+
+
+def extract_main_content(page, section_name):
+    """Extract title and text from the entry-header and entry-content."""
+    main_content = find_main_content(page)
+
+    # Extract title from entry-header
+    entry_header = main_content.find(class_='entry-header')
+    title_element = entry_header.find(class_='entry-title') if entry_header is not None else None
+    title = element_text(title_element)
+
+    # Extract general text from entry-content
+    general_text = element_text(main_content.find(class_='entry-content'))
+
+    record = {
+        'Section': section_name,
+        'Link': page.url,
+        'Title': title,
+        'Text': general_text
+    }
+    return main_content, record
+
+
+def extract_main_content_notitle(page, section_name):
+    """Extract the text of entry-content, titled after the section."""
+    main_content = find_main_content(page)
+
+    record = {
+        'Section': section_name,
+        'Link': page.url,
+        'Title': f"{section_name} - Main Content",
+        'Text': element_text(main_content.find(class_='entry-content'))
+    }
+    return main_content, record
+
+
+def extract_collapsible_sections(main_content, url, section_name):
+    """Extract collapsible sections and their content within the main-content."""
+    records = []
+    for section in main_content.find_all(class_='sights-expander-wrapper'):
+        # The title is in the <h5> tag, the content in the expander (present in the page even when collapsed)
+        title_element = section.find('h5')
+        content_div = section.find(class_='sights-expander-content')
+        if title_element is None or content_div is None:
+            print(f"Error extracting section from {url}: incomplete expander")
+            continue
+        records.append({
+            'Section': section_name,
+            'Link': url,
+            'Title': element_text(title_element),
+            'Text': element_text(content_div)
+        })
+    return records
+
+
+def extract_dropdown_content(page, section_name):
+    """Extract content from each dropdown section on the page."""
+    records = []
+    dropdown_sections = page.soup.find_all(class_='sights-expander-wrapper')
+    if not dropdown_sections:
+        print(f"No dropdown sections found for {section_name}")
+
+    for section in dropdown_sections:
+        # The question is in the dropdown trigger, the answer in the element it controls
+        question_element = section.find(class_='mceEditable')
+        expander_trigger = section.find(class_='sights-expander-trigger')
+        answer_id = expander_trigger.get('aria-controls') if expander_trigger is not None else None
+        answer_content = page.soup.find(id=answer_id) if answer_id else None
+        answer_element = answer_content.find(class_='mceEditable') if answer_content is not None else None
+        if question_element is None or answer_element is None:
+            print(f"Error extracting dropdown content in {page.url}: incomplete dropdown")
+            continue
+        records.append({
+            'Section': section_name,
+            'Link': page.url,
+            'Title': element_text(question_element),
+            'Text': element_text(answer_element)
+        })
+    return records
+
+
+def scrape_section_page(page, request):
+    """
+    Main page of a section: its content and collapsible sections, then its internal links
+    (content and collapsible sections) and sidebar links (content only).
+    """
+    section_name = request.context['section']
+    main_content, record = extract_main_content(page, section_name)
+    records = [record] + extract_collapsible_sections(main_content, page.url, section_name)
+
+    host = request.context.get('internal_host')
+    follow = [Request(link, 'page', request.context) for link in links_in(main_content, page.url, host)]
+    for sidebar in page.soup.select('.sidebar'):
+        follow += [Request(link, 'sidebar_page', request.context) for link in links_in(sidebar, page.url, host)]
+    return records, follow
+
+
+def scrape_linked_page(page, request):
+    main_content, record = extract_main_content(page, request.context['section'])
+    return [record] + extract_collapsible_sections(main_content, page.url, request.context['section']), []
+
+
+def scrape_sidebar_page(page, request):
+    return [extract_main_content(page, request.context['section'])[1]], []
+
+
+def scrape_notitle_page(page, request):
+    return [extract_main_content_notitle(page, request.context['section'])[1]], []
+
+
+def scrape_dropdown_page(page, request):
+    section_name = request.context['section']
+    _, record = extract_main_content_notitle(page, section_name)
+    return [record] + extract_dropdown_content(page, section_name), []
+
+
+# Handler of each request kind of the crawl config
+HANDLERS = {
+    'courses': scrape_courses_section,
+    'section': scrape_section_page,
+    'page': scrape_linked_page,
+    'sidebar_page': scrape_sidebar_page,
+    'notitle': scrape_notitle_page,
+    'dropdown': scrape_dropdown_page
+}
+
+
+def extractor_version():
+    """Hash of the extraction code (the handlers, element_text and english_text), the page cache version."""
+    digest = hashlib.sha256()
+    for path in (__file__, crawler.__file__, corpusnormalizer.__file__):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+# Records cached by another version of the extractors are extracted again
+EXTRACTOR_VERSION = extractor_version()
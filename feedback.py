@@ -1,9 +1,10 @@
 # feedback.py
 
-import aiofiles
-import json
-from langchain.schema import HumanMessage, AIMessage
-from langchain.chat_models import ChatOpenAI
+from functools import lru_cache
+import httpx
+from langchain_openai import ChatOpenAI
+
+from freshness import last_log_date
 
 # Feedback variables
 affirmative_responses = [
@@ -18,46 +19,25 @@ negative_responses = [
     "no thanks", "nah", "not quite", "don't think so", "disappointed", "bad"
 ]
 
-async def save_conversation_history(conversation_data):
-    # Process the chat_history to make it JSON serializable
-    processed_chat_history = []
-    for message in conversation_data['chat_history']:
-        if isinstance(message, HumanMessage):
-            processed_chat_history.append({
-                'type': 'human',
-                'content': message.content
-            })
-        elif isinstance(message, AIMessage):
-            processed_chat_history.append({
-                'type': 'ai',
-                'content': message.content
-            })
-        else:
-            # Handle other message types if necessary
-            processed_chat_history.append({
-                'type': 'other',
-                'content': message.content
-            })
-    # Replace the chat_history with the processed version
-    conversation_data['chat_history'] = processed_chat_history
-
-    # Now it's safe to serialize conversation_data to JSON
-    async with aiofiles.open("conversation_history.json", mode="a") as file:
-        await file.write(json.dumps(conversation_data) + "\n")
-
 def get_last_updated_date(log_file_path):
-    import re
     try:
-        with open(log_file_path, 'r') as file:
-            lines = file.readlines()
-        for line in reversed(lines):
-            match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', line)
-            if match:
-                return match.group(0)
-        return "Unknown"
+        # Reads the log backwards from the end instead of loading it whole
+        return last_log_date(log_file_path) or "Unknown"
     except Exception as e:
         print(f"Error reading log file: {e}")
         return "Unknown"
 
+# Connection pool limits for the OpenAI HTTP clients
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+@lru_cache(maxsize=None)
 def load_llm():
-    return ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0.7)
\ No newline at end of file
+    """
+    Returns the shared chat model. Built once so every request reuses its pooled HTTP connections.
+    """
+    return ChatOpenAI(
+        model_name="gpt-3.5-turbo",
+        temperature=0.7,
+        http_client=httpx.Client(limits=HTTP_LIMITS),
+        http_async_client=httpx.AsyncClient(limits=HTTP_LIMITS)
+    )
\ No newline at end of file
@@ -0,0 +1,228 @@
+# feedbackanalytics.py
+# Summarizes the feedback log (conversation_history.json and its rotated, possibly gzipped, files)
+# into a compact JSON file: per-intent helpful rates, turns to feedback, unanswered questions and
+# clusters of similar failing questions with the corpus pages that best match them.
+#
+# Usage (from the repository root):
+#   python feedbackanalytics.py --log conversation_history.json --output feedback_summary.json
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+from collections import Counter
+import numpy as np
+
+from answercache import normalize_question
+from datafiles import atomic_write
+from feedbacksink import FEEDBACK_LOG_PATH
+from intentregistry import intent_registry
+
+SUMMARY_PATH = "feedback_summary.json"
+
+# Answers that did not answer the question (the prompts' "not in the context" replies and the timeout message)
+UNANSWERED_PATTERN = re.compile(
+    r"couldn't find|could not find|can't find|don't have (any )?information|no information|not (mentioned|provided|available) in|"
+    r"not able to (find|provide)|rephrase your question|taking longer than expected",
+    re.IGNORECASE
+)
+
+# Minimum cosine similarity of a question to the first question of its cluster
+CLUSTER_SIMILARITY = 0.85
+
+# Persist directory of the collection searched by each store of the intent registry
+STORE_DIRECTORIES = {"general": "chroma_store", "research": "chroma_store1"}
+
+
+def log_files(path):
+    """
+    The rotated files (oldest first) and then the current log.
+    """
+    rotated = sorted(glob.glob(glob.escape(path) + ".*"))
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def iter_records(paths):
+    """
+    Yields the records of the JSON lines files one by one, skipping lines that do not parse.
+    """
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def question_answers(chat_history):
+    """
+    Yields (question, answer) pairs of a chat history; answer is None for an unanswered last question.
+    """
+    question = None
+    for message in chat_history:
+        if message.get("type") == "human":
+            if question is not None:
+                yield question, None
+            question = message.get("content", "")
+        elif message.get("type") == "ai" and question is not None:
+            yield question, message.get("content", "")
+            question = None
+    if question is not None:
+        yield question, None
+
+
+class FeedbackAnalytics:
+    """
+    Accumulates the statistics of the feedback log one record at a time.
+    """
+
+    def __init__(self):
+        self.intents = {}
+        self.questions = Counter()
+        self.unanswered = Counter()
+        self.failing = Counter()
+        self.failing_intents = {}
+        self.records = 0
+
+    def add(self, record):
+        self.records += 1
+        intent = intent_registry.parent(record.get("intent") or "Unknown")
+        feedback = record.get("feedback")
+        stats = self.intents.setdefault(intent, {
+            "conversations": 0, "positive": 0, "negative": 0, "no_feedback": 0,
+            "turns_to_feedback": Counter(), "latency_total": 0.0, "latency_count": 0
+        })
+        stats["conversations"] += 1
+        stats["positive" if feedback == "positive" else "negative" if feedback == "negative" else "no_feedback"] += 1
+        if record.get("latency_seconds") is not None:
+            stats["latency_total"] += record["latency_seconds"]
+            stats["latency_count"] += 1
+
+        turns = 0
+        for question, answer in question_answers(record.get("chat_history", [])):
+            turns += 1
+            key = normalize_question(question)
+            if not key:
+                continue
+            self.questions[(intent, key)] += 1
+            unanswered = answer is None or bool(UNANSWERED_PATTERN.search(answer))
+            if unanswered:
+                self.unanswered[(intent, key)] += 1
+            if unanswered or feedback == "negative":
+                self.failing[key] += 1
+                self.failing_intents.setdefault(key, intent)
+        if feedback is not None:
+            stats["turns_to_feedback"][turns] += 1
+
+    def intent_summary(self):
+        summary = {}
+        for intent, stats in sorted(self.intents.items()):
+            rated = stats["positive"] + stats["negative"]
+            turns = stats["turns_to_feedback"]
+            summary[intent] = {
+                "conversations": stats["conversations"],
+                "positive": stats["positive"],
+                "negative": stats["negative"],
+                "no_feedback": stats["no_feedback"],
+                "helpful_rate": round(stats["positive"] / rated, 3) if rated else None,
+                "avg_turns_to_feedback": round(sum(t * n for t, n in turns.items()) / sum(turns.values()), 2) if turns else None,
+                "turns_to_feedback": {str(t): n for t, n in sorted(turns.items())},
+                "avg_latency_seconds": round(stats["latency_total"] / stats["latency_count"], 3) if stats["latency_count"] else None
+            }
+        return summary
+
+    def clusters(self, embedding_model, lexical_indexes, top=20):
+        """
+        Groups the failing questions by embedding similarity (greedy, most frequent question first)
+        and suggests the corpus pages that best match each group.
+        """
+        questions = [question for question, _ in self.failing.most_common()]
+        if not questions:
+            return []
+        # Embeddings come from the shared embedding cache, so repeated runs cost nothing
+        vectors = np.asarray(embedding_model.embed_documents(questions), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        assigned = np.full(len(questions), -1)
+        clusters = []
+        for index in range(len(questions)):
+            if assigned[index] >= 0:
+                continue
+            members = np.where((assigned < 0) & (vectors @ vectors[index] >= CLUSTER_SIMILARITY))[0]
+            assigned[members] = len(clusters)
+            clusters.append([questions[member] for member in members])
+
+        summary = []
+        for members in sorted(clusters, key=lambda group: -sum(self.failing[q] for q in group))[:top]:
+            intent = self.failing_intents[members[0]]
+            summary.append({
+                "question": members[0],
+                "intent": intent,
+                "count": sum(self.failing[question] for question in members),
+                "examples": members[:5],
+                "pages": suggest_pages(members[0], intent, lexical_indexes)
+            })
+        return summary
+
+    def summary(self, embedding_model=None, lexical_indexes=None, top=20):
+        return {
+            "records": self.records,
+            "intents": self.intent_summary(),
+            "frequent_questions": [
+                {"intent": intent, "question": question, "count": count}
+                for (intent, question), count in self.questions.most_common(top)
+            ],
+            "unanswered_questions": [
+                {"intent": intent, "question": question, "count": count}
+                for (intent, question), count in self.unanswered.most_common(top)
+            ],
+            "failing_clusters": self.clusters(embedding_model, lexical_indexes or {}, top) if embedding_model else []
+        }
+
+
+def suggest_pages(question, intent, lexical_indexes, k=3):
+    """
+    Links of the corpus pages whose chunks best match the question, candidates for a re-scrape.
+    """
+    index = lexical_indexes.get(intent_registry.config(intent).store)
+    if index is None:
+        return []
+    links = []
+    for _, metadata, _ in index.search(question, k=k * 3):
+        link = metadata.get("link")
+        if link and link not in links:
+            links.append(link)
+    return links[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the feedback log.")
+    parser.add_argument("--log", default=FEEDBACK_LOG_PATH, help="Current feedback log; its rotated files are read too")
+    parser.add_argument("--output", default=SUMMARY_PATH)
+    parser.add_argument("--top", type=int, default=20, help="Entries per list in the summary")
+    parser.add_argument("--no-clusters", action="store_true", help="Skip clustering (no embedding model needed)")
+    args = parser.parse_args()
+
+    analytics = FeedbackAnalytics()
+    paths = log_files(args.log)
+    for record in iter_records(paths):
+        analytics.add(record)
+
+    embedding_model = lexical_indexes = None
+    if not args.no_clusters:
+        from embeddingcache import load_embedding_model
+        from lexicalindex import BM25Index
+        embedding_model = load_embedding_model()
+        lexical_indexes = {store: BM25Index.load(directory) for store, directory in STORE_DIRECTORIES.items()}
+
+    summary = analytics.summary(embedding_model, lexical_indexes, args.top)
+    with atomic_write(args.output) as file:
+        json.dump(summary, file, separators=(",", ":"))
+    print(f"Read {analytics.records} records from {len(paths)} files, wrote {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# feedbacksink.py
+
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+from metrics import metrics
+
+# JSON lines file of the rated (or unrated) conversations
+FEEDBACK_LOG_PATH = "conversation_history.json"
+
+
+def message_record(message):
+    # "human", "ai" or "system" (the conversation summary)
+    return {"type": message.type, "content": message.content}
+
+
+def feedback_record(conversation_data, session_id=None, latency_seconds=None):
+    """
+    Builds the log record of a conversation without modifying conversation_data.
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "session_id": session_id,
+        "intent": conversation_data.get("intent"),
+        "feedback": conversation_data.get("feedback"),
+        "latency_seconds": latency_seconds,
+        "chat_history": [message_record(message) for message in conversation_data.get("chat_history", [])]
+    }
+
+
+class FeedbackSink:
+    """
+    Writes feedback records from a background task: records are queued by the request handlers and
+    appended in batches, when batch_size records are waiting or every flush_interval seconds.
+    The log is rotated when it exceeds max_bytes or when the day changes (rotate="size" or "daily"),
+    and rotated files are gzipped if compress is set.
+    """
+
+    def __init__(self, path=FEEDBACK_LOG_PATH, batch_size=100, flush_interval=1.0, max_bytes=10 * 1024 * 1024,
+                 rotate="size", compress=True, max_queue=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate = rotate
+        self.compress = compress
+        self.max_queue = max_queue
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, conversation_data, session_id=None, latency_seconds=None):
+        """
+        Queues a conversation for writing; never blocks the request.
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(feedback_record(conversation_data, session_id, latency_seconds))
+        except asyncio.QueueFull:
+            metrics.incr("feedback_records_dropped")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            # Wait for a first record, then flush flush_interval later or as soon as the batch is full
+            batch, deadline = [], None
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    record = self._queue.get_nowait()
+                else:
+                    timeout = None if deadline is None else deadline - loop.time()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    try:
+                        record = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if record is None:
+                    stopping = True
+                    break
+                if deadline is None:
+                    deadline = loop.time() + self.flush_interval
+                batch.append(record)
+            if batch:
+                try:
+                    # File I/O (and gzip) off the event loop
+                    await loop.run_in_executor(None, self._write, batch)
+                except OSError as e:
+                    print(f"Error writing feedback records to {self.path}: {e}")
+                    metrics.incr("feedback_records_dropped", len(batch))
+
+    def _write(self, batch):
+        self._maybe_rotate()
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("".join(json.dumps(record) + "\n" for record in batch))
+        metrics.incr("feedback_records_written", len(batch))
+        metrics.incr("feedback_flushes")
+
+    def _maybe_rotate(self):
+        if not os.path.exists(self.path):
+            return
+        if self.rotate == "daily":
+            # The log holds the records of the day it was last written
+            due = time.strftime("%Y%m%d", time.localtime(os.path.getmtime(self.path))) != time.strftime("%Y%m%d")
+        else:
+            due = os.path.getsize(self.path) >= self.max_bytes
+        if not due:
+            return
+        rotated = base = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        number = 0
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            number += 1
+            rotated = f"{base}.{number}"
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as source, gzip.open(rotated + ".gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(rotated)
+        metrics.incr("feedback_rotations")
+
+    async def stop(self):
+        """
+        Writes the queued records and stops the background task, e.g. at shutdown.
+        """
+        if self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
@@ -0,0 +1,127 @@
+# freshness.py
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+from datafiles import FileWatcher, atomic_write
+
+# Manifest written by scrape.py and embeddings.py, read by the server for the welcome message
+FRESHNESS_MANIFEST = "freshness.json"
+
+# Scraping log of older scrape.py runs, used when there is no manifest
+SCRAPING_LOG = "scraping_log.log"
+
+# Bytes read per step when searching the log backwards
+TAIL_BLOCK_SIZE = 4096
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_PATTERN = re.compile(rb"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+
+def now():
+    return datetime.now().strftime(DATE_FORMAT)
+
+
+def load_manifest(path=FRESHNESS_MANIFEST):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_manifest(path, update):
+    manifest = load_manifest(path)
+    update(manifest)
+    with atomic_write(path) as file:
+        json.dump(manifest, file, indent=2)
+
+
+def record_scrape(site, path=FRESHNESS_MANIFEST):
+    """Records that site was scraped just now."""
+    _update_manifest(path, lambda manifest: manifest.setdefault("sites", {}).__setitem__(site, now()))
+
+
+def record_ingest(collection, source_hash, path=FRESHNESS_MANIFEST):
+    """
+    Records that a collection was ingested from sources with source_hash, and derives the corpus version
+    from the source hashes of all collections.
+    """
+    def update(manifest):
+        collections = manifest.setdefault("collections", {})
+        collections[collection] = {"ingested_at": now(), "source_hash": source_hash}
+        manifest["last_ingest"] = collections[collection]["ingested_at"]
+        hashes = "".join(collections[name]["source_hash"] for name in sorted(collections))
+        manifest["corpus_version"] = hashlib.sha256(hashes.encode("utf-8")).hexdigest()[:12]
+    _update_manifest(path, update)
+
+
+def last_log_date(log_path):
+    """
+    Returns the last timestamp in the log, reading it backwards from the end block by block.
+    """
+    with open(log_path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        tail = b""
+        while position > 0:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            file.seek(position)
+            tail = file.read(step) + tail
+            # Only lines that are complete (or start at the beginning of the file) are searched
+            lines = tail.split(b"\n")
+            complete = lines if position == 0 else lines[1:]
+            for line in reversed(complete):
+                match = DATE_PATTERN.search(line)
+                if match:
+                    return match.group(0).decode("ascii")
+            tail = lines[0] if position > 0 else b""
+    return None
+
+
+class Freshness:
+    """
+    Serves the last update date of the corpus from the freshness manifest, reloaded when it changes.
+    Without a manifest, the last timestamp of the scraping log is used, read once per change of the log.
+    """
+
+    def __init__(self, path=FRESHNESS_MANIFEST, log_path=SCRAPING_LOG):
+        self.path = path
+        self.log_path = log_path
+        self._log_date = None
+        self._log_mtime = None
+        self._watcher = FileWatcher([path])
+        self.manifest = load_manifest(path)
+
+    def maybe_reload(self):
+        if self._watcher.changed():
+            self.manifest = load_manifest(self.path)
+
+    def _legacy_date(self):
+        try:
+            mtime = os.path.getmtime(self.log_path)
+            if mtime != self._log_mtime:
+                self._log_date = last_log_date(self.log_path)
+                self._log_mtime = mtime
+        except OSError as e:
+            print(f"Error reading log file: {e}")
+            return None
+        return self._log_date
+
+    def last_updated(self):
+        """
+        Returns the date of the most recent scrape, or "Unknown".
+        """
+        self.maybe_reload()
+        sites = self.manifest.get("sites")
+        if sites:
+            return max(sites.values())
+        return self._legacy_date() or "Unknown"
+
+    def snapshot(self):
+        self.maybe_reload()
+        return dict(self.manifest)
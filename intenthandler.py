@@ -1,45 +1,22 @@
 # intenthandler.py
 
+from intentregistry import intent_registry
+from metrics import metrics
+
+# Intents already reported as unrouted, so each is logged once
+_unrouted_intents = set()
+
 def get_parent_intent(intent_name):
     """
     Returns the parent intent for a given intent. If the intent is a parent intent, returns itself.
+    Intents without a route (answered with the default settings) are counted and logged once.
     """
-    # Intent mapping dictionary
-    intent_mapping = {
-        "Get_Course_info": {
-            "sub_intents": [
-                "Get_Course_info - custom"
-            ]
-        },
-        "Get_CPT_OPT_Info": {
-            "sub_intents": [
-                "Get_CPT_Application_Process",
-                "Get_CPT_OPT_Documents",
-                "Get_OPT_Application_Process",
-                "Get_CPT_Eligibility",
-                "Get_OPT_Eligibility"
-            ]
-        },
-        "Get_General_Info": {
-            "sub_intents": [
-                "Get_General_Info - custom"
-            ]
-        },
-        "Get_Research_Info": {
-            "sub_intents": [
-                "Get_Research_Faculty_Info",
-                "Get_Research_Info - custom"
-            ]
-        }
-    }
-
-    # Iterate through the mapping to find the parent intent
-    for parent_intent, details in intent_mapping.items():
-        if intent_name == parent_intent or intent_name in details["sub_intents"]:
-            return parent_intent
-
-    # If no match is found, return None
-    return intent_name
+    if intent_name and not intent_registry.resolves(intent_name):
+        metrics.incr("unrouted_intents")
+        if intent_name not in _unrouted_intents:
+            _unrouted_intents.add(intent_name)
+            print(f"Warning: Dialogflow intent {intent_name!r} has no route in intentregistry.INTENTS, using the defaults.")
+    return intent_registry.parent(intent_name)
 
 def handle_intent_change(intent_name, memory, feedback_vars):
     """
@@ -95,42 +72,3 @@ def is_syllabus_query(query: str) -> bool:
     query_lower = query.lower()
     return any(keyword in query_lower for keyword in syllabus_keywords)
 
-
-def get_full_course_title(course_input):
-    course_mapping = {
-  "data 601": "DATA 601 Introduction to Data Science",
-  "data 602": "DATA 602 Introduction to Data Analysis and Machine Learning",
-  "data 603": "DATA 603 Platforms for Big Data Processing",
-  "data 604": "DATA 604 Data Management",
-  "data 605": "DATA 605 Ethical Legal Issues in Data Science",
-  "data 606": "DATA 606 Capstone in Data Science",
-  "data 607": "DATA 607 Leadership in Data Science",
-  "data 608": "DATA608 Probability and Statistics for Data Science",
-  "data 690": "DATA 690 Special Topics: Statistical Analysis and Visualization with Python",
-  "data 690": "DATA 690 Special Topics: Mathematical Foundations for Machine Learning",
-  "data 690": "DATA 690 Special Topics: Data Structures and Algorithms in Python",
-  "data 690": "DATA 690 Special Topics: Applied Machine Learning with MATLAB",
-  "data 690": "DATA 690 Special Topics: Designing Data Driven Web Applications",
-  "data 690": "DATA 690 Financial Data Science",
-  "data 690": "DATA 690 Special Topic: Modern Practical Deep Learning",
-  "data 690": "DATA 690 Special Topics: Introduction to Natural Language Processing",
-  "data 690": "DATA 690 Special Topics: Artificial Intelligence for Practitioners",
-  "data 696": "DATA 696 Independent Study for Interns and Co-op Students",
-  "data 699": "DATA 699 Independent Study in Data Science",
-  "data 613": "DATA 613  Data Visualization and Communication",
-  "data 621": "DATA 621  Practical Deep Learning"}
-    # Normalize input
-    course_input_lower = course_input.lower()
-
-    # First, try exact match in keys (course IDs)
-    for course_id in course_mapping.keys():
-        if course_id.lower() == course_input_lower:
-            return course_mapping[course_id]
-
-    # Then, try exact match in values (course titles)
-    for course_title in course_mapping.values():
-        if course_title.lower() == course_input_lower:
-            return course_title
-
-    # No match found
-    return None
\ No newline at end of file
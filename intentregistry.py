@@ -0,0 +1,155 @@
+# intentregistry.py
+
+from prompts import PROMPTS, load_prompt
+
+# Retrieval collections a parent intent can search
+STORES = ("general", "research")
+
+# Dialogflow intents answered by the RAG pipeline, one entry per parent intent:
+# sub_intents: Dialogflow intents routed to the parent
+# store: collection searched for context, k: chunks retrieved
+# context_tokens / history_tokens: prompt token budgets of the retrieved chunks and the chat history
+# cache: whether answers of the intent go through the answer cache
+# syllabus: whether syllabus questions of the intent take the syllabus lookup path
+INTENTS = {
+    "Get_Course_info": {
+        "sub_intents": ["Get_Course_info - custom"],
+        "store": "general",
+        "k": 5,
+        "context_tokens": 1200,
+        "history_tokens": 600,
+        "cache": True,
+        "syllabus": True
+    },
+    "Get_CPT_OPT_Info": {
+        "sub_intents": [
+            "Get_CPT_Application_Process",
+            "Get_CPT_OPT_Documents",
+            "Get_OPT_Application_Process",
+            "Get_CPT_Eligibility",
+            "Get_OPT_Eligibility"
+        ],
+        "store": "general",
+        "k": 5,
+        "context_tokens": 1200,
+        "history_tokens": 600,
+        "cache": True
+    },
+    "Get_General_Info": {
+        "sub_intents": ["Get_General_Info - custom"],
+        "store": "general",
+        "k": 5,
+        "context_tokens": 1200,
+        "history_tokens": 600,
+        "cache": True
+    },
+    "Get_Research_Info": {
+        "sub_intents": ["Get_Research_Faculty_Info", "Get_Research_Info - custom"],
+        "store": "research",
+        "k": 5,
+        "context_tokens": 1800,
+        "history_tokens": 600,
+        "cache": True
+    }
+}
+
+# Dialogflow intents handled by main.py before routing
+BUILTIN_INTENTS = ["Default Welcome Intent"]
+
+# Intents of the Dialogflow agent that call the webhook, as exported from the agent. The server
+# validates them at startup (DIALOGFLOW_INTENTS overrides the list); update it with the agent.
+AGENT_INTENTS = [
+    "Default Welcome Intent",
+    "Get_Course_info", "Get_Course_info - custom",
+    "Get_CPT_OPT_Info", "Get_CPT_Application_Process", "Get_CPT_OPT_Documents", "Get_OPT_Application_Process",
+    "Get_CPT_Eligibility", "Get_OPT_Eligibility",
+    "Get_General_Info", "Get_General_Info - custom",
+    "Get_Research_Info", "Get_Research_Faculty_Info", "Get_Research_Info - custom"
+]
+
+# Settings of the intents that are not in INTENTS
+DEFAULT_INTENT = {
+    "sub_intents": [],
+    "store": "general",
+    "k": 5,
+    "context_tokens": 1200,
+    "history_tokens": 600,
+    "cache": True
+}
+
+
+class IntentConfig:
+    def __init__(self, name, store, k, context_tokens, history_tokens, cache, syllabus, prompt):
+        self.name = name
+        self.store = store
+        self.k = k
+        self.context_tokens = context_tokens
+        self.history_tokens = history_tokens
+        self.cache = cache
+        self.syllabus = syllabus
+        self.prompt = prompt
+
+
+class IntentRegistry:
+    """
+    Routing table built once from INTENTS: any Dialogflow intent (parent or sub-intent, in any casing)
+    resolves to its parent and the parent's settings with a single dict lookup.
+    """
+
+    def __init__(self, intents=INTENTS, builtin_intents=BUILTIN_INTENTS):
+        self.configs = {}
+        self.parents = {}
+        self.builtin_intents = {name.lower() for name in builtin_intents}
+        errors = []
+        prompt_names = {name.lower() for name in PROMPTS}
+        for parent, settings in intents.items():
+            if settings.get("store") not in STORES:
+                errors.append(f"{parent}: unknown store {settings.get('store')!r}")
+            for field in ("k", "context_tokens", "history_tokens"):
+                if not isinstance(settings.get(field), int) or settings[field] < 1:
+                    errors.append(f"{parent}: {field} must be a positive integer")
+            if parent.lower() not in prompt_names:
+                errors.append(f"{parent}: no prompt in prompts.PROMPTS")
+            for name in [parent, *settings.get("sub_intents", [])]:
+                existing = self.parents.setdefault(name.lower(), parent)
+                if existing != parent:
+                    errors.append(f"{name}: routed to both {existing} and {parent}")
+            self.configs[parent] = self._compile(parent, settings)
+        if errors:
+            raise ValueError("Invalid intent registry: " + "; ".join(errors))
+        self.default = self._compile(None, DEFAULT_INTENT)
+
+    @staticmethod
+    def _compile(name, settings):
+        return IntentConfig(
+            name, settings["store"], settings["k"], settings["context_tokens"], settings["history_tokens"],
+            settings.get("cache", True), settings.get("syllabus", False), load_prompt(name)
+        )
+
+    def parent(self, intent_name):
+        """
+        Returns the parent intent of a Dialogflow intent, or the intent itself when it is not routed.
+        """
+        return self.parents.get(intent_name.lower(), intent_name) if intent_name else intent_name
+
+    def config(self, intent_name):
+        """
+        Returns the settings of the parent of intent_name, or the default settings.
+        """
+        parent = self.parents.get(intent_name.lower()) if intent_name else None
+        return self.configs[parent] if parent is not None else self.default
+
+    def resolves(self, intent_name):
+        return intent_name.lower() in self.parents or intent_name.lower() in self.builtin_intents
+
+    def validate(self, intent_names):
+        """
+        Raises ValueError when one of the agent's Dialogflow intents has no route.
+        """
+        missing = [name for name in intent_names if not self.resolves(name)]
+        if missing:
+            raise ValueError(f"Dialogflow intents without a route in intentregistry.INTENTS: {', '.join(missing)}")
+
+
+# Shared registry, validated when the module is imported
+intent_registry = IntentRegistry()
@@ -0,0 +1,154 @@
+# lexicalindex.py
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from datafiles import FileWatcher, atomic_write
+
+# File written next to each Chroma collection by embeddings.py
+LEXICAL_INDEX_FILE = "bm25_index.json"
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "where", "which", "who", "with",
+    "you", "your", "about", "get", "need", "tell", "please", "there", "this", "that"
+}
+
+# Course codes and document names such as "DATA 690", "I-20" or "F-1"
+CODE_PATTERN = re.compile(r"\b([A-Za-z]{1,5})([\s-]?)(\d{1,4})\b")
+# Acronyms such as "SSN", "EAD" or "OPT"
+ACRONYM_PATTERN = re.compile(r"\b[A-Z]{2,6}\b")
+
+
+def find_codes(text):
+    # "I-20" is a code, "in 2024" is not
+    return [
+        f"{letters}{digits}".lower() for letters, separator, digits in CODE_PATTERN.findall(text)
+        if separator == "-" or letters.lower() not in STOPWORDS
+    ]
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens, plus one joined token per code ("data 690" -> "data690") so codes match as a unit.
+    """
+    return re.findall(r"\w+", text.lower()) + find_codes(text)
+
+
+def is_identifier_query(query):
+    """
+    True when identifiers (course codes, document names, acronyms) make up most of the query's content words.
+    """
+    codes = find_codes(query)
+    identifiers = len(codes) + len(ACRONYM_PATTERN.findall(query))
+    if not identifiers:
+        return False
+    content_words = [token for token in re.findall(r"\w+", query.lower()) if token not in STOPWORDS]
+    # A code like "DATA 690" is two words but one identifier
+    content_words = max(len(content_words) - len(codes), 1)
+    return identifiers / content_words > 0.5
+
+
+class BM25Index:
+    """
+    In-process inverted index over the chunks of one collection, scored with BM25.
+    """
+
+    def __init__(self, ids, texts, metadatas, postings, lengths, path=None):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.postings = postings
+        self.lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self.path = path
+        self._watcher = FileWatcher([path]) if path else None
+        # Searches run in the search thread pool: a reload swaps the index data under this lock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, chunks):
+        """
+        Builds the index from chunks: {chunk ID: (text, metadata)}.
+        """
+        ids, texts, metadatas, lengths = [], [], [], []
+        postings = {}
+        for doc, (chunk, (text, metadata)) in enumerate(sorted(chunks.items())):
+            tokens = tokenize(text + " " + str(metadata.get("title", "")))
+            ids.append(chunk)
+            texts.append(text)
+            metadatas.append(metadata)
+            lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                postings.setdefault(term, []).append([doc, count])
+        return cls(ids, texts, metadatas, postings, lengths)
+
+    def save(self, persist_directory):
+        os.makedirs(persist_directory, exist_ok=True)
+        path = os.path.join(persist_directory, LEXICAL_INDEX_FILE)
+        with atomic_write(path) as file:
+            json.dump({
+                "ids": self.ids,
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+                "postings": self.postings,
+                "lengths": self.lengths
+            }, file)
+
+    @classmethod
+    def load(cls, persist_directory):
+        """
+        Loads the index saved in persist_directory, or returns None if there is none.
+        """
+        path = os.path.join(persist_directory, LEXICAL_INDEX_FILE)
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"No lexical index loaded from {path}: {e}")
+            return None
+        return cls(data["ids"], data["texts"], data["metadatas"], data["postings"], data["lengths"], path=path)
+
+    def maybe_reload(self):
+        """
+        Reloads the index in place when embeddings.py wrote a newer version of its file.
+        """
+        if self._watcher is None or not self._watcher.changed():
+            return
+        fresh = BM25Index.load(os.path.dirname(self.path))
+        if fresh is not None:
+            data = {name: value for name, value in fresh.__dict__.items() if name not in ("_lock", "_watcher")}
+            with self._lock:
+                self.__dict__.update(data)
+
+    def search(self, query, k=5):
+        """
+        Returns the k best (text, metadata, score) of the query's chunks, all from one version of the index.
+        """
+        self.maybe_reload()
+        with self._lock:
+            texts, metadatas = self.texts, self.metadatas
+            postings, lengths, avg_length = self.postings, self.lengths, self.avg_length
+        count = len(lengths)
+        scores = {}
+        for term in set(tokenize(query)):
+            term_postings = postings.get(term)
+            if not term_postings:
+                continue
+            idf = math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for doc, tf in term_postings:
+                norm = K1 * (1 - B + B * lengths[doc] / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(texts[doc], metadatas[doc], score) for doc, score in best]
+
+    def __len__(self):
+        return len(self.ids)
@@ -2,21 +2,28 @@
 
 from dotenv import load_dotenv
 import os
+import time
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-import nest_asyncio
 import uvicorn
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain.memory import ConversationBufferMemory
-from langchain.chat_models import ChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
 
 # Import custom modules
 from intenthandler import get_parent_intent, handle_intent_change, is_syllabus_query
-from queryhandler import user_is_asking_for_link, extract_links_from_source_docs, handle_syllabus_query, select_retriever
-from feedback import save_conversation_history, affirmative_responses, negative_responses, get_last_updated_date, load_llm
-from prompts import load_prompt
+from intentregistry import AGENT_INTENTS, intent_registry
+from queryhandler import user_is_asking_for_link, extract_links_from_source_docs, handle_syllabus_query
+from feedback import affirmative_responses, negative_responses, load_llm
+from chainregistry import ChainRegistry
+from answercache import AnswerCache, CORPUS_VERSION_FILE
+from embeddingcache import load_embedding_model
+from lexicalindex import BM25Index
+from syllabusindex import SyllabusIndex
+from coursecatalog import load_course_catalog
+from metrics import metrics
+from sessionstore import SessionStore, SQLiteSessionBackend
+from summarymemory import ConversationSummarizer
+from feedbacksink import FeedbackSink, FEEDBACK_LOG_PATH
+from freshness import Freshness, FRESHNESS_MANIFEST
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -30,8 +37,8 @@ ngrok_auth = os.getenv("ngrok_auth")
 persist_directory_retriever = "chroma_store"
 persist_directory_research = "chroma_store1"
 
-# Initialize OpenAI embeddings and Chroma vector stores
-embedding_model = OpenAIEmbeddings(model="text-embedding-ada-002")
+# Initialize the (cached) embedding model and Chroma vector stores
+embedding_model = load_embedding_model()
 chroma_store = Chroma(
     collection_name="retriever_bot",
     embedding_function=embedding_model,
@@ -43,31 +50,107 @@ chroma_store1 = Chroma(
     persist_directory=persist_directory_research
 )
 
-# Initialize memory
-memory = ConversationBufferMemory(memory_key="chat_history", output_key="answer", return_messages=True)
-
-# Initialize feedback variables
-feedback_vars = {
-    'last_intent': None,
-    'interaction_count': 0,
-    'feedback_requested': False,
-    'pending_conversation_data': None,
-    'feedback_timeout_counter': 0,
-    'MAX_FEEDBACK_PROMPTS': 2
-}
-
-def get_user_messages(memory):
-    user_messages = []
-    for msg in memory.chat_memory.messages:
-        if msg.type == 'human':
-            user_messages.append(msg.content)
-    return '\n'.join(user_messages)
+# Load the BM25 indexes built by embeddings.py next to each Chroma store (hybrid retrieval)
+lexical_index = BM25Index.load(persist_directory_retriever)
+lexical_index1 = BM25Index.load(persist_directory_research)
+
+# Load the course -> syllabus chunks index built by embeddings.py
+syllabus_index = SyllabusIndex(
+    persist_directory_retriever,
+    chunks_per_course=int(os.getenv("SYLLABUS_CHUNKS_PER_COURSE", "8"))
+)
+
+# Compile the course catalog (course codes and titles) from the scraped Courses section
+course_catalog = load_course_catalog(os.getenv("COURSE_CATALOG_SOURCE", "Data/dil_scraped_data.csv"))
+
+# Last scrape and ingest dates published by scrape.py and embeddings.py (reloaded when they change)
+freshness = Freshness(
+    path=os.getenv("FRESHNESS_MANIFEST_PATH", FRESHNESS_MANIFEST),
+    log_path="./scraping_log.log"
+)
+
+# Initialize the answer cache, cleared whenever embeddings.py rebuilds one of the collections
+answer_cache_size = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+answer_cache = AnswerCache(
+    max_entries=answer_cache_size,
+    ttl_seconds=int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400")),
+    similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+    version_paths=[
+        os.path.join(persist_directory_retriever, CORPUS_VERSION_FILE),
+        os.path.join(persist_directory_research, CORPUS_VERSION_FILE)
+    ],
+    # Off by default: a similar question past the deadline gets an extractive answer instead
+    fallback_threshold=float(os.getenv("ANSWER_CACHE_FALLBACK_SIMILARITY", "0")) or None
+) if answer_cache_size else None
+
+# Fail fast when one of the agent's Dialogflow intents (comma-separated list, or the committed
+# intentregistry.AGENT_INTENTS) has no route
+dialogflow_intents = [name.strip() for name in os.getenv("DIALOGFLOW_INTENTS", "").split(",") if name.strip()]
+intent_registry.validate(dialogflow_intents or AGENT_INTENTS)
+
+# Build the retrieval QA chains once, one per parent intent.
+# Answers must be ready before the Dialogflow webhook deadline (5 seconds).
+chain_registry = ChainRegistry(
+    chroma_store,
+    chroma_store1,
+    deadline_seconds=float(os.getenv("ANSWER_DEADLINE_SECONDS", "4.5")),
+    answer_cache=answer_cache,
+    lexical_index=lexical_index,
+    lexical_index1=lexical_index1
+)
+
+# Initialize the per-session conversation store (memory and feedback variables per Dialogflow session)
+session_ttl_seconds = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+session_db_path = os.getenv("SESSION_DB_PATH")
+session_backend = SQLiteSessionBackend(session_db_path) if session_db_path else None
+if session_backend is not None:
+    session_backend.purge_expired(session_ttl_seconds)
+# In "summary" mode the last turns are kept verbatim and older ones folded into a rolling summary,
+# so the memory and prompt size of a session stay flat; "buffer" keeps the raw messages only
+memory_mode = os.getenv("MEMORY_MODE", "summary")
+summarizer = ConversationSummarizer(
+    load_llm(),
+    keep_turns=int(os.getenv("SUMMARY_KEEP_TURNS", "3")),
+    max_summary_tokens=int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+) if memory_mode == "summary" else None
+session_store = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "10000")),
+    ttl_seconds=session_ttl_seconds,
+    max_messages=int(os.getenv("SESSION_MAX_MESSAGES", "20")),
+    backend=session_backend,
+    summarizer=summarizer
+)
+
+# Background writer of the feedback log (batched appends, rotation of the log file)
+feedback_sink = FeedbackSink(
+    path=os.getenv("FEEDBACK_LOG_PATH", FEEDBACK_LOG_PATH),
+    batch_size=int(os.getenv("FEEDBACK_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("FEEDBACK_FLUSH_SECONDS", "1.0")),
+    max_bytes=int(os.getenv("FEEDBACK_MAX_BYTES", str(10 * 1024 * 1024))),
+    rotate=os.getenv("FEEDBACK_ROTATE", "size"),
+    compress=os.getenv("FEEDBACK_COMPRESS", "true").lower() == "true"
+)
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Let the running summary updates finish (and be persisted) before exiting
+    if summarizer is not None:
+        await summarizer.drain()
+    # Write the queued feedback records
+    await feedback_sink.stop()
 
 @app.post("/webhook")
 async def webhook(request: Request):
-    global memory, feedback_vars
     # Extract the query and intent from DialogFlow request
     req = await request.json()
+    # Look up the conversation state of this Dialogflow session
+    state = await session_store.get(req.get("session", ""))
+    try:
+        return await handle_request(req, state.memory, state.feedback_vars)
+    finally:
+        await session_store.save(state)
+
+async def handle_request(req, memory, feedback_vars):
     query = req.get("queryResult", {}).get("queryText", "")
     intent_name = req.get("queryResult", {}).get("intent", {}).get("displayName", "")
     parameters = req.get("queryResult", {}).get("parameters", {})
@@ -76,8 +159,7 @@ async def webhook(request: Request):
     if intent_name == "Default Welcome Intent":
         memory.chat_memory.clear()
 
-        log_file_path = "./scraping_log.log"
-        last_updated_date = get_last_updated_date(log_file_path)
+        last_updated_date = freshness.last_updated()
         response_text = (
                 f"Hello! I was last updated on {last_updated_date}. "
                 "While I strive to provide accurate and up-to-date details, there may have been changes since this date. How may I assist you today?"
@@ -105,7 +187,9 @@ async def webhook(request: Request):
             # Update the pending conversation data with feedback
             feedback_vars['pending_conversation_data']["feedback"] = feedback
             # Save the conversation history with feedback
-            await save_conversation_history(feedback_vars['pending_conversation_data'])
+            feedback_sink.submit(
+                feedback_vars['pending_conversation_data'], req.get("session"), feedback_vars.get('last_answer_seconds')
+            )
             # Reset flags and clear memory
             feedback_vars['feedback_requested'] = False
             feedback_vars['pending_conversation_data'] = None
@@ -120,7 +204,9 @@ async def webhook(request: Request):
             if feedback_vars['feedback_timeout_counter'] >= feedback_vars['MAX_FEEDBACK_PROMPTS']:
                 # Give up on prompting for feedback after max attempts
                 # Save the conversation history without feedback
-                await save_conversation_history(feedback_vars['pending_conversation_data'])
+                feedback_sink.submit(
+                    feedback_vars['pending_conversation_data'], req.get("session"), feedback_vars.get('last_answer_seconds')
+                )
                 feedback_vars['feedback_requested'] = False
                 feedback_vars['pending_conversation_data'] = None
                 feedback_vars['feedback_timeout_counter'] = 0
@@ -133,28 +219,19 @@ async def webhook(request: Request):
     # **Step 2: Handle Intent Change and Interaction Count**
     handle_intent_change(intent_name, memory, feedback_vars)
     # Determine if the query is a syllabus query
-    if intent_name == "Get_Course_info" and is_syllabus_query(query):
+    start = time.perf_counter()
+    if intent_registry.config(intent_name).syllabus and is_syllabus_query(query):
         # Handle syllabus query separately
-        result = await handle_syllabus_query(query, parameters, memory, chroma_store)
+        result = await handle_syllabus_query(
+            query, parameters, memory, chroma_store, syllabus_index, course_catalog,
+            deadline_seconds=chain_registry.deadline_seconds, llm=chain_registry.llm
+        )
         response_text = result['answer']
     else:
-        # Select the appropriate retriever and prompt based on intent
-        retriever = select_retriever(intent_name, chroma_store, chroma_store1)
-        prompt = load_prompt(intent_name)
-
-        # Initialize the question generation and document response chains
-        qa_chain = ConversationalRetrievalChain.from_llm(
-                llm= load_llm(),
-                retriever=retriever,
-                memory=memory,
-                combine_docs_chain_kwargs={'prompt': prompt},
-                return_source_documents=True,
-                verbose=True,
-                rephrase_question=True,
-        )
-        # Run the query through the QA chain and get the response
-        result = qa_chain({"question": query, "chat_history": get_user_messages(memory)})
+        # Run the query through the prebuilt QA chain of the intent with this session's memory
+        result = await chain_registry.arun(intent_name, query, memory)
         response_text = result['answer']
+    feedback_vars['last_answer_seconds'] = round(time.perf_counter() - start, 4)
 
     # Extract source documents
     source_docs = result.get('source_documents', [])
@@ -185,7 +262,15 @@ async def webhook(request: Request):
 
     return response
 
-# Run the FastAPI app using nest_asyncio
-nest_asyncio.apply()
+@app.get("/metrics")
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot["sessions"] = session_store.stats()
+    snapshot["embedding_cache"] = embedding_model.stats()
+    snapshot["answer_cache_entries"] = len(answer_cache) if answer_cache is not None else 0
+    snapshot["freshness"] = freshness.snapshot()
+    return snapshot
+
+# Run the FastAPI app
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=5000)
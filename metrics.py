@@ -0,0 +1,52 @@
+# metrics.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    In-process counters and timings, exposed by the /metrics endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self.timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            timings = {
+                name: {
+                    "count": timing["count"],
+                    "total_seconds": round(timing["total"], 6),
+                    "avg_seconds": round(timing["total"] / timing["count"], 6) if timing["count"] else 0.0,
+                    "max_seconds": round(timing["max"], 6)
+                }
+                for name, timing in self.timings.items()
+            }
+            return {"counters": dict(self.counters), "timings": timings}
+
+
+# Shared metrics instance for the whole application
+metrics = Metrics()
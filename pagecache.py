@@ -0,0 +1,99 @@
+# pagecache.py
+
+import hashlib
+import json
+import sqlite3
+import time
+
+# Cache of the crawled pages shared by the crawls of scrape.py
+PAGE_CACHE_PATH = "page_cache.db"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(request, version=""):
+    """
+    A page is cached per handler and context: the same URL extracted by another handler, or under
+    another section, gives other records. Records extracted by another version of the extractors are
+    not found.
+    """
+    return f"{version}\x00{request.kind}\x00{request.url}\x00{json.dumps(request.context, sort_keys=True)}"
+
+
+class CachedPage:
+    def __init__(self, etag, last_modified, content_hash, records, follow):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.records = records
+        # Follow-up requests as (url, kind, context, depth)
+        self.follow = follow
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Persistent cache of the crawled pages of one site: validators (ETag, Last-Modified), content hash,
+    extracted records and follow-up requests, stored in SQLite. Pages that were not reached by the last
+    crawl are dropped by retain(). Writes are committed one by one, so the caches of sites crawled at
+    the same time can share the database file.
+    version identifies the extractors: pages cached by another version are extracted again, then dropped.
+    """
+
+    def __init__(self, site, path=PAGE_CACHE_PATH, version=""):
+        self.site = site
+        self.path = path
+        self.version = version
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "site TEXT NOT NULL, key TEXT NOT NULL, url TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "content_hash TEXT NOT NULL, records TEXT NOT NULL, follow TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (site, key))"
+        )
+
+    def get(self, key):
+        row = self._conn.execute(
+            "SELECT etag, last_modified, content_hash, records, follow FROM pages WHERE site = ? AND key = ?",
+            (self.site, key)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, digest, records, follow = row
+        return CachedPage(etag, last_modified, digest, json.loads(records), json.loads(follow))
+
+    def put(self, key, url, headers, digest, records, follow):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.site, key, url, headers.get("etag"), headers.get("last-modified"), digest,
+             json.dumps(records), json.dumps(follow), time.time())
+        )
+
+    def refresh(self, key, headers):
+        """Updates the validators of an unchanged page when the server sent new ones."""
+        if headers.get("etag") or headers.get("last-modified"):
+            self._conn.execute(
+                "UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "fetched_at = ? WHERE site = ? AND key = ?",
+                (headers.get("etag"), headers.get("last-modified"), time.time(), self.site, key)
+            )
+
+    def retain(self, keys):
+        """Drops the pages of the site whose key is not in keys."""
+        stored = [key for (key,) in self._conn.execute("SELECT key FROM pages WHERE site = ?", (self.site,))]
+        dropped = [(self.site, key) for key in stored if key not in keys]
+        self._conn.executemany("DELETE FROM pages WHERE site = ? AND key = ?", dropped)
+        return len(dropped)
+
+    def close(self):
+        self._conn.close()
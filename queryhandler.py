@@ -1,6 +1,114 @@
 # queryhandler.py
-from intenthandler import get_full_course_title
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, List
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from answercache import document_key
+from answerpipeline import TIMEOUT_MESSAGE, LatencyBudget, extractive_fallback
+from coursecatalog import load_course_catalog
 from feedback import load_llm
+from lexicalindex import is_identifier_query
+from metrics import metrics
+
+# Bounded thread pool for the blocking Chroma searches, so they never run on the event loop
+search_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_WORKERS", "8")),
+    thread_name_prefix="vector-search"
+)
+
+async def run_in_search_executor(func, *args, **kwargs):
+    """
+    Runs a blocking vector store call in the search thread pool and awaits its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, partial(func, *args, **kwargs))
+
+class ExecutorRetriever(BaseRetriever):
+    """
+    Wraps a retriever so that async retrieval runs the blocking search in the search thread pool.
+    """
+    retriever: BaseRetriever
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await run_in_search_executor(self.retriever.invoke, query)
+
+    async def asearch(self, query: str, embedding_holder: list = None, k: int = None) -> List[Document]:
+        """
+        Embeds the query, appends the embedding to embedding_holder (so callers can reuse it) and
+        searches the vector store with it.
+        """
+        vectorstore = self.retriever.vectorstore
+        embedding = await run_in_search_executor(vectorstore.embeddings.embed_query, query)
+        if embedding_holder is not None:
+            embedding_holder.append(embedding)
+        search_kwargs = dict(self.retriever.search_kwargs)
+        if k is not None:
+            search_kwargs['k'] = k
+        return await run_in_search_executor(vectorstore.similarity_search_by_vector, embedding, **search_kwargs)
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses BM25 (lexical) and vector search results with reciprocal rank fusion.
+    Queries made mostly of identifiers ("DATA 690", "I-20", "SSN") are answered from the lexical
+    index alone, which skips the embedding call.
+    """
+    vector_retriever: ExecutorRetriever
+    lexical_index: Any
+    k: int = 5
+    candidates: int = 20
+    rrf_k: int = 60
+
+    def _lexical_docs(self, hits):
+        return [Document(page_content=text, metadata=metadata) for text, metadata, _ in hits]
+
+    def _fuse(self, lexical_docs, vector_docs):
+        scores, docs = {}, {}
+        for ranking in (lexical_docs, vector_docs):
+            for rank, doc in enumerate(ranking):
+                key = document_key(doc)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                docs.setdefault(key, doc)
+        best = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        return [docs[key] for key in best]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        lexical = self.lexical_index.search(query, self.candidates)
+        if lexical and is_identifier_query(query):
+            return self._lexical_docs(lexical[:self.k])
+        vector_docs = self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self._fuse(self._lexical_docs(lexical), vector_docs)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await self.asearch(query)
+
+    def _lexical_search(self, query):
+        return self._lexical_docs(self.lexical_index.search(query, self.candidates))
+
+    async def asearch(self, query: str, embedding_holder: list = None) -> List[Document]:
+        """
+        Runs the BM25 search (and index reload) in the search thread pool, together with the vector search.
+        """
+        if is_identifier_query(query):
+            lexical_docs = await run_in_search_executor(self._lexical_search, query)
+            if lexical_docs:
+                metrics.incr("lexical_fast_path")
+                return lexical_docs[:self.k]
+            vector_docs = await self.vector_retriever.asearch(query, embedding_holder, k=self.candidates)
+        else:
+            lexical_docs, vector_docs = await asyncio.gather(
+                run_in_search_executor(self._lexical_search, query),
+                self.vector_retriever.asearch(query, embedding_holder, k=self.candidates)
+            )
+        metrics.incr("hybrid_searches")
+        return self._fuse(lexical_docs, vector_docs)
 
 def user_is_asking_for_link(query):
     keywords = ["link", "source", "reference", "find", "references", "sources", "url", "where can I find", "can you provide the link"]
@@ -27,29 +135,55 @@ def extract_links_from_source_docs(source_docs):
 
     return links
 
-async def retrieve_syllabus_documents(course_titles, chroma_store):
+async def retrieve_syllabus_documents(course_titles, chroma_store, syllabus_index=None):
+    # Fetch the course chunks directly by ID when the course index was built by embeddings.py
+    if syllabus_index is not None and syllabus_index.available():
+        try:
+            return await run_in_search_executor(syllabus_index.get_documents, course_titles, chroma_store)
+        except Exception as e:
+            print(f"Error during syllabus lookup: {e}")
+            return []
+
     # Build the metadata filter
     metadata_filter = {"title": {"$in": course_titles}}
 
     # Perform similarity search with the filter
     try:
-        results = chroma_store.similarity_search("", k=5, filter=metadata_filter)
+        results = await run_in_search_executor(chroma_store.similarity_search, "", k=5, filter=metadata_filter)
         return results
     except Exception as e:
         print(f"Error during syllabus retrieval: {e}")
         return []
 
-async def handle_syllabus_query(query: str, parameters: dict, memory, chroma_store) -> dict:
+async def handle_syllabus_query(query: str, parameters: dict, memory, chroma_store, syllabus_index=None, course_catalog=None,
+                                deadline_seconds=None, llm=None) -> dict:
+    """
+    Answers a syllabus question with a week-by-week table of the requested courses. Retrieval and
+    generation run within the deadline (like answerpipeline.generate_answer); when it is hit, an
+    extractive answer from the retrieved chunks is returned.
+    """
+    budget = LatencyBudget(deadline_seconds)
     # Extract course name from parameters
     course_inputs = parameters.get("Course_name", [])
     if not course_inputs:
         return {"answer":"Please specify the course name or ID for which you want the syllabus."}
     print(course_inputs)
-    # Get the full course title from the input
-    course_titles = [get_full_course_title(course_input) for course_input in course_inputs]
+    # Resolve the course codes and names to the full course titles (a code can have several offerings)
+    course_catalog = course_catalog or load_course_catalog()
+    course_titles = course_catalog.resolve_all(course_inputs)
     print('Here are the course titles: ', course_titles)
     # Retrieve syllabus documents
-    retrieved_docs = await retrieve_syllabus_documents(course_titles, chroma_store)
+    start = time.perf_counter()
+    try:
+        retrieved_docs = await asyncio.wait_for(
+            retrieve_syllabus_documents(course_titles, chroma_store, syllabus_index), timeout=budget.limit()
+        )
+    except asyncio.TimeoutError:
+        retrieved_docs = None
+    budget.record("retrieve", time.perf_counter() - start)
+    if retrieved_docs is None:
+        metrics.incr("deadline_exceeded")
+        return _syllabus_result(TIMEOUT_MESSAGE, [], True, budget)
     if not retrieved_docs:
         return {"answer": "Sorry, I couldn't find the syllabus for the specified course."}
 
@@ -73,19 +207,35 @@ async def handle_syllabus_query(query: str, parameters: dict, memory, chroma_sto
         Answer:
         """
     # Generate the answer using the LLM
+    start = time.perf_counter()
     try:
-        llm = load_llm()
-        response =  llm.invoke([prompt])
-        memory.chat_memory.add_user_message(query)
-        memory.chat_memory.add_ai_message(response)
+        llm = llm or load_llm()
+        response = await asyncio.wait_for(llm.ainvoke([prompt]), timeout=budget.limit())
+        answer, deadline_exceeded = response.content, False
+    except asyncio.TimeoutError:
+        metrics.incr("deadline_exceeded")
+        metrics.incr("extractive_fallbacks")
+        answer, deadline_exceeded = extractive_fallback(retrieved_docs), True
     except Exception as e:
         print(f"Error during LLM generation: {e}")
-        return {"response": "An error occurred while generating the syllabus response."}
+        return {"answer": "An error occurred while generating the syllabus response."}
+    finally:
+        budget.record("generate", time.perf_counter() - start)
+    memory.chat_memory.add_user_message(query)
+    memory.chat_memory.add_ai_message(answer)
+
+    return _syllabus_result(answer, retrieved_docs, deadline_exceeded, budget)
 
-    return {"answer": response.content, "source_documents": retrieved_docs}
+def _syllabus_result(answer, docs, deadline_exceeded, budget):
+    budget.record("total", budget.elapsed())
+    print(f"Stage timings: {budget.timings} | Deadline exceeded: {deadline_exceeded}")
+    return {"answer": answer, "source_documents": docs, "deadline_exceeded": deadline_exceeded,
+            "timings": dict(budget.timings)}
 
-def select_retriever(intent_name, chroma_store, chroma_store1):
-    if intent_name == "Get_Research_info":
-        return chroma_store1.as_retriever(search_type="similarity", search_kwargs={'k': 5})
-    else:
-        return chroma_store.as_retriever(search_type="similarity", search_kwargs={'k': 5})
+def build_retriever(chroma_store, lexical_index=None, k=5):
+    retriever = chroma_store.as_retriever(search_type="similarity", search_kwargs={'k': k})
+    retriever = ExecutorRetriever(retriever=retriever)
+    if lexical_index is not None:
+        # Hybrid BM25 + vector retrieval when the lexical index was built by embeddings.py
+        return HybridRetriever(vector_retriever=retriever, lexical_index=lexical_index, k=k)
+    return retriever
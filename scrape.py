@@ -1,500 +1,214 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import regex as re
-import pandas as pd
-import time
+# scrape.py
+# Crawls the sites of the crawl config into the corpus (Data/corpus and its CSV exports).
+#
+# Usage (from the repository root):
+#   python scrape.py                      # all sites, incremental
+#   python scrape.py --site research      # one site
+#   python scrape.py --full --publish     # extract every page again, then commit and push the data
+#
+# As a library:
+#   from scrape import scrape
+#   results = scrape(["isss.umbc.edu"], save=False)
+
+import argparse
+import asyncio
+import json
+import os
 import logging
+import subprocess
 from datetime import datetime
+from freshness import record_scrape
+from crawler import Crawler, HostPoliteness, HttpFetcher, Request, SeleniumFetcher
+from crawlconfig import SITES
+from corpus import CORPUS_DIR, CSV_COLUMNS, SITE_CSV, diff_records, partition_path, read_site, write_site
+from corpusnormalizer import normalize_records
+from datafiles import atomic_write
+from extractors import EXTRACTOR_VERSION, HANDLERS
+from pagecache import PAGE_CACHE_PATH, PageCache
+
+# Changes of the last scrape of each site (added, modified and removed records)
+CHANGESET_PATH = "Data/changeset.json"
+
+SCRAPING_LOG = "scraping_log.log"
 
-# Specify the path to your ChromeDriver
-service = Service(executable_path="C:/Users/Surya/RetrieverBot_Capstone/chromedriver_win32/chromedriver.exe")
 
-# Configure logging
-logging.basicConfig(
-    filename="scraping_log.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 def log_update_date(message):
     """Log a custom message with the current date."""
     current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     logging.info(f"{message} - Date: {current_date}")
 
-# Function to retain only English words and recognized punctuation
-def extract_english_text(text):
-    pattern = r"[A-Za-z0-9\s.,!?\"'():;-]"
-    return ''.join(re.findall(pattern, text))
-
-
-# Function to check if a page requires login or special access
-def requires_login_or_access_denied(driver):
-    page_source = driver.page_source.lower()
-    login_indicators = [
-        "login",
-        "access denied",
-        "restricted access",
-        "please sign in",
-        "requires login",
-        "permission required",
-        "sign in to continue"
-    ]
-    return any(indicator in page_source for indicator in login_indicators)
-
-
-# Recursive function to scrape links within the "Courses" section up to a certain depth
-def scrape_courses_section(driver, url, section_name, current_depth=1, max_depth=3):
-    """Scrape links within a section up to a specified depth."""
-
-    # Print max_depth type to debug
-    print(f"Current depth: {current_depth}, Max depth: {max_depth}, Max depth type: {type(max_depth)}")
-
-    if url in visited_links or current_depth > max_depth:
-        return  # End recursion if URL has been visited or max depth is reached
-
-    # Mark this link as visited
-    visited_links.add(url)
-
-    # Visit the URL
-    driver.get(url)
-    time.sleep(2)
-    wait = WebDriverWait(driver, 10)
-
-    try:
-        # Check if the page requires login or special access
-        if requires_login_or_access_denied(driver):
-            print(f"Restricted access: {url} requires login.")
-            results.append({
-                'Section': section_name,
-                'Link': url,
-                'Title': 'Login Required',
-                'Text': 'Requires login to access this content.'
-            })
-            return
-
-        # Extract the 'main-content' div
-        main_content_element = wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'main-content')))
-
-        # Extract the title and content
-        header_element = main_content_element.find_element(By.CLASS_NAME, 'entry-header')
-        title = extract_english_text(header_element.text)
-
-        content_element = main_content_element.find_element(By.CLASS_NAME, 'entry-content')
-        content = extract_english_text(content_element.text)
-
-        # Append extracted data to the results list
-        results.append({
-            'Section': section_name,
-            'Link': url,
-            'Title': title,
-            'Text': content
-        })
-
-        # Find all internal links in the 'entry-content' div within 'main-content'
-        links_in_content = content_element.find_elements(By.TAG_NAME, 'a')
-        internal_links = [link.get_attribute('href') for link in links_in_content if link.get_attribute('href')]
-
-        # Recursively visit each internal link, increasing depth
-        for link in internal_links:
-            if link and link not in visited_links:
-                scrape_courses_section(driver, link, section_name, current_depth + 1, max_depth)
-
-                # Return to the original page after visiting each link
-                driver.get(url)
-                time.sleep(2)
-
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
-
-
-def extract_main_content(url, section_name):
-    """Extract title and text from the entry-header, and detailed subheading content within entry-content."""
-    if url in visited_links:
-        return None  # Skip if the URL has already been visited
-    visited_links.add(url)
-
-    driver.get(url)
-    time.sleep(2)
 
+def site_seeds(site, config=SITES):
+    """Seed requests of a site of the crawl config."""
+    internal_host = config[site].get("internal_host")
+    seeds = []
+    for page in config[site]["pages"]:
+        context = {'section': page["section"]}
+        if internal_host:
+            context['internal_host'] = internal_host
+        seeds.append(Request(page["url"], page["kind"], context))
+    return seeds
+
+
+async def crawl_site(site, fetcher, politeness, config=SITES, workers=8, page_cache_path=PAGE_CACHE_PATH,
+                     full=False):
+    """
+    Crawls one site with its own frontier and results. Without page_cache_path, or with full, every page
+    is extracted; with full, the page cache is refreshed for the next incremental crawl.
+    Returns the records in discovery order and the crawl stats.
+    """
+    cache = PageCache(site, page_cache_path, EXTRACTOR_VERSION) if page_cache_path else None
+    crawler = Crawler(HANDLERS, fetcher, workers=workers, politeness=politeness, cache=cache, full=full)
+    logging.info(f"Scraping started for {site}")
     try:
-        # Wait for the main content to load
-        main_content = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'main-content')))
-
-        # Extract title from entry-header
-        entry_header = main_content.find_element(By.CLASS_NAME, 'entry-header')
-        title = entry_header.find_element(By.CLASS_NAME, 'entry-title').text.strip()
-
-        # Extract general text from entry-content
-        entry_content = main_content.find_element(By.CLASS_NAME, 'entry-content')
-        general_text = entry_content.get_attribute('innerText').strip()
-
-        # Store the main title and general text for the section
-        results.append({
-            'Section': 'AI',
-            'Link': url,
-            'Title': title,
-            'Text': general_text
-        })
-
-        return main_content
-
-    except Exception as e:
-        print(f"Error extracting main content from {url}: {e}")
-        return None
-
-
-def extract_main_content_notitle(url, section_name):
-    """Extract title and text from the entry-header, and detailed subheading content within entry-content."""
-    if url in visited_links:
-        return None  # Skip if the URL has already been visited
-    visited_links.add(url)
-
-    driver.get(url)
-    time.sleep(2)
+        results = await crawler.crawl(site_seeds(site, config))
+        if cache is not None:
+            # Pages that are no longer linked are forgotten
+            crawler.stats["dropped"] = cache.retain(crawler.visited)
+    finally:
+        if cache is not None:
+            cache.close()
+        logging.info(f"Scraping completed for {site}")
+    print(f"Crawl stats for {site}: {crawler.stats}")
+    return results, crawler.stats
+
+
+async def crawl_sites(sites, fetcher, politeness, config=SITES, workers=8, page_cache_path=PAGE_CACHE_PATH,
+                      full=False):
+    """
+    Crawls the sites concurrently, sharing the fetcher and the per-host limits.
+    Returns {site: records}; a site whose crawl failed is left out.
+    """
+    outcomes = await asyncio.gather(
+        *(crawl_site(site, fetcher, politeness, config, workers, page_cache_path, full) for site in sites),
+        return_exceptions=True
+    )
+    results = {}
+    for site, outcome in zip(sites, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"Error scraping {site}: {outcome}")
+            logging.error(f"Scraping failed for {site}: {outcome}")
+            continue
+        results[site] = outcome[0]
+    return results
+
+
+def make_fetcher(kind="http", per_host=2, chromedriver_path=None):
+    """"http" fetches the static HTML, "selenium" renders pages with headless Chrome."""
+    if kind == "selenium":
+        return SeleniumFetcher(drivers=per_host, chromedriver_path=chromedriver_path)
+    return HttpFetcher()
+
+
+def save_corpus(results, site, changeset_path=CHANGESET_PATH, report=None):
+    """
+    Writes the records of a site to its corpus partition (and CSV export) when they differ from the
+    current ones, and records the added, modified and removed records (and the normalization report)
+    in the changeset file.
+    """
+    previous = read_site(site, columns=CSV_COLUMNS)
+    previous = previous.to_pylist() if previous is not None else None
+    changes = diff_records(previous or [], results)
+    print(f"{site}: {len(changes['added'])} records added, {len(changes['modified'])} modified, "
+          f"{len(changes['removed'])} removed.")
+
+    if previous is None or any(changes.values()):
+        write_site(results, site)
 
     try:
-        # Wait for the main content to load
-        main_content = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'main-content')))
-
-        # Extract general text from entry-content
-        entry_content = main_content.find_element(By.CLASS_NAME, 'entry-content')
-        general_text = entry_content.get_attribute('innerText').strip()
-
-        # Store the main title and general text for the section
-        results.append({
-            'Section': section_name,
-            'Link': url,
-            'Title': f"{section_name} - Main Content",
-            'Text': general_text
-        })
-
-        return main_content
-
-    except Exception as e:
-        print(f"Error extracting main content from {url}: {e}")
-        return None
-
-
-def extract_collapsible_sections(main_content, url, section_name):
-    """Extract collapsible sections and their content within the main-content."""
-    sections = main_content.find_elements(By.CLASS_NAME, 'sights-expander-wrapper')
-    for section in sections:
+        with open(changeset_path) as file:
+            changeset = json.load(file)
+    except (OSError, ValueError):
+        changeset = {}
+    changeset[site] = dict(changes, source=partition_path(site), scraped_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                           normalization=report)
+    with atomic_write(changeset_path) as file:
+        json.dump(changeset, file, indent=2)
+    return changes
+
+
+def scrape(sites=None, config=SITES, fetcher="http", workers=8, per_host=2, delay=0.25,
+           page_cache_path=PAGE_CACHE_PATH, chromedriver_path=None, save=True, normalize=True, full=False):
+    """
+    Crawls the sites (all sites of the config by default) concurrently, normalizes each site's records
+    (clean text, no near-duplicate records or boilerplate lines) and, with save, writes each site's corpus
+    and records its scrape time. With full, every page is extracted again. Returns {site: records}.
+    """
+    sites = list(sites or config)
+
+    async def run():
+        page_fetcher = make_fetcher(fetcher, per_host, chromedriver_path)
         try:
-            # Locate the title within the <h5> tag
-            title_element = section.find_element(By.TAG_NAME, 'h5')
-            title = title_element.text.strip()
-
-            # Expand the section if it's collapsible
-            expander_trigger = section.find_element(By.CLASS_NAME, 'sights-expander-trigger')
-            expander_trigger.click()
-            WebDriverWait(driver, 5).until(
-                EC.visibility_of(section.find_element(By.CLASS_NAME, 'sights-expander-content'))
-            )
-
-            # Locate the content div that follows
-            content_div = section.find_element(By.CLASS_NAME, 'sights-expander-content')
-            text = content_div.text.strip()
-
-            # Store the result with section name
-            results.append({
-                'Section': section_name,
-                'Link': url,
-                'Title': title,
-                'Text': text
-            })
-
-        except Exception as e:
-            print(f"Error extracting section from {url}: {e}")
-
-
-def scrape_internal_links(main_content, section_name):
-    """Identify and visit internal links from the main content."""
-    try:
-        # Find all anchor tags within the entry-content div
-        anchor_tags = main_content.find_elements(By.TAG_NAME, 'a')
-        links_to_visit = []
-
-        for anchor in anchor_tags:
-            href = anchor.get_attribute('href')
-            if href and "dil.umbc.edu" in href and href not in visited_links:
-                links_to_visit.append(href)
-
-        # Visit each link and extract data
-        for link in links_to_visit:
-            main_content = extract_main_content(link, section_name)
-            if main_content:
-                extract_collapsible_sections(main_content, link, section_name)
-
-    except Exception as e:
-        print(f"Error finding internal links: {e}")
-
-
-def scrape_sidebar_links(url, section_name):
-    """Scrape all links found in the sidebar and return to the main page after each."""
-    driver.get(url)
-    time.sleep(2)
-
-    try:
-        sidebar_links = driver.find_elements(By.CSS_SELECTOR, '.sidebar a')
-        for link in sidebar_links:
-            href = link.get_attribute('href')
-            if href and "dil.umbc.edu" in href and href not in visited_links:
-                # Scrape content from each sidebar link
-                extract_main_content(href, section_name)
-                time.sleep(2)
-
-                # Return to the main page
-                driver.get(url)
-                time.sleep(2)
+            return await crawl_sites(sites, page_fetcher, HostPoliteness(per_host, delay), config, workers,
+                                     page_cache_path, full)
+        finally:
+            await page_fetcher.close()
+
+    results = asyncio.run(run())
+    reports = {}
+    if normalize:
+        for site in results:
+            results[site], reports[site] = normalize_records(results[site])
+            print(f"Normalized {site}: {reports[site]}")
+    if save:
+        for site, records in results.items():
+            save_corpus(records, site, report=reports.get(site))
+            record_scrape(site)
+    return results
 
-    except Exception as e:
-        print(f"Error extracting sidebar links from {url}: {e}")
-
-
-def extract_dropdown_content(url, section_name):
-    """Extract content from each dropdown section on the page."""
-    driver.get(url)
-    time.sleep(2)
-
-    try:
-        # Locate all dropdown sections on the page
-        dropdown_sections = driver.find_elements(By.CLASS_NAME, 'sights-expander-wrapper')
-        if not dropdown_sections:
-            print(f"No dropdown sections found for {section_name}")
-
-        for section in dropdown_sections:
-            try:
-                # Locate the question element (title) within the dropdown trigger
-                question_element = section.find_element(By.CLASS_NAME, 'mceEditable')
-                question_text = question_element.text.strip()
-
-                # Expand the dropdown by clicking the trigger element
-                expander_trigger = section.find_element(By.CLASS_NAME, 'sights-expander-trigger')
-                driver.execute_script("arguments[0].click();", expander_trigger)
-                time.sleep(1)  # Allow time for expansion
-
-                # Wait for content to load in the dropdown
-                answer_id = expander_trigger.get_attribute('aria-controls')
-                answer_content = WebDriverWait(driver, 5).until(
-                    EC.visibility_of_element_located((By.ID, answer_id))
-                )
-
-                # Extract the answer text
-                answer_text = answer_content.find_element(By.CLASS_NAME, 'mceEditable').get_attribute(
-                    'innerText').strip()
-
-                # Store each FAQ entry in results
-                results.append({
-                    'Section': section_name,
-                    'Link': url,
-                    'Title': question_text,
-                    'Text': answer_text
-                })
-                print(f"Dropdown content '{question_text}' extracted.")
-
-            except Exception as e:
-                print(f"Error extracting dropdown content in {url}: {e}")
-
-    except Exception as e:
-        print(f"Error loading dropdown sections from {url}: {e}")
-
-
-# Set up Chrome options
-chrome_options = Options()
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-# chrome_options.add_argument("--headless")  # Uncomment to run in headless mode
-
-# Initialize the WebDriver
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# List of main sections with URLs
-sections = {
-    "Courses": 'https://dil.umbc.edu/courses/',
-    "Pathways & Certificates": 'https://dil.umbc.edu/pathways-and-certificates/',
-    "Advising & Resources": 'https://dil.umbc.edu/resources/',
-    "Policies": 'https://dil.umbc.edu/policies/',
-    "Prospective Students": 'https://dil.umbc.edu/prospective-students/',
-    "Faculty": 'https://dil.umbc.edu/faculty/'
-}
-
-# Initialize a list to store the results
-results = []
-visited_links = set()
-
-# Main scraping process for each section
-try:
-    logging.info("Scraping started for dil.umbc.edu")
-    for section_name, url in sections.items():
-        print(f"Scraping section: {section_name}")
-
-        if section_name == "Courses":
-            scrape_courses_section(driver, url, section_name)
-
-        # Step 1: Extract content from the main page
-        main_content = extract_main_content(url, section_name)
-
-        # Step 2: Extract collapsible sections (if any)
-        if main_content:
-            extract_collapsible_sections(main_content, url, section_name)
-
-            # Step 3: Identify and visit internal links within the main content
-            scrape_internal_links(main_content, section_name)
-
-            # Step 4: Scrape all links in the sidebar
-            scrape_sidebar_links(url, section_name)
-
-finally:
-    # Log the end of the scraping process
-    logging.info("Scraping completed for dil.umbc.edu")
-    # Close the browser
-    driver.quit()
-
-# Create a DataFrame from the collected data and reorder columns
-df_dil = pd.DataFrame(results, columns=['Section', 'Link', 'Title', 'Text'])
-
-# Save the DataFrame to an CSV file
-df_dil.to_csv('Data/dil_scraped_data.csv', index=False)
-
-# Set up Chrome options
-chrome_options = Options()
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-# chrome_options.add_argument("--headless")  # Uncomment to run in headless mode
-
-# Initialize the WebDriver
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# Initialize a list to store the results
-results = []
-visited_links = set()
-
-# Define the F-1 Students sub-sections with their URLs
-sub_sections = {
-    "Current Students: General": "https://isss.umbc.edu/international-students-f-1/current-students/",
-    "Current Students: Employment": "https://isss.umbc.edu/f-1-students/current-students-employment/",
-    "Working On-Campus": "https://isss.umbc.edu/international-students-f-1/current-students-employment/working-on-campus/",
-    "Economoic Hardship Work Authorization": "https://isss.umbc.edu/international-students-f-1/current-students-employment/economic-hardship-work-authorization/",
-    "Understanding Your Documents": "https://isss.umbc.edu/f-1-students/understanding-your-documents/",
-    "Social Security Number (SSN)": "https://isss.umbc.edu/f-1-students/social-security-number/",
-    "US Taxes": "https://isss.umbc.edu/international-students-f-1/current-students/understanding-your-tax-documents/",
-    "Applying for a Maryland Driver’s License & Getting a State ID": "https://isss.umbc.edu/resources/transportation/driving-in-maryland-and-getting-a-state-id/",
-    "Change of Immigration Status": "https://isss.umbc.edu/change-of-status/"
-}
-
-# List of URLs with dropdowns
-dropdown_pages = {
-    "Internships and International Students": "https://dil.umbc.edu/resources/internships-and-international-students/",
-    "OPT and OPT STEM Information": "https://isss.umbc.edu/opt-and-opt-stem-information/",
-    "Working Off-Campus": "https://isss.umbc.edu/international-students-f-1/current-students-employment/working-off-campus/"
-}
-
-try:
-    logging.info("Scraping started for ISSS website")
-    # Scrape each specified sub-section and its sidebar links
-    for sub_section_name, link in sub_sections.items():
-        print(f"Scraping section: {sub_section_name}")
-
-        # Step 1: Extract main content
-        main_content = extract_main_content_notitle(link, sub_section_name)
-
-    # Scrape each page with dropdowns
-    for section_name, url in dropdown_pages.items():
-        print(f"Scraping dropdown section: {section_name}")
-
-        # Step 1: Extract content from the main page
-        main_content = extract_main_content_notitle(url, section_name)
-
-        # Step 2: Extract collapsible sections (if any)
-        if main_content:
-            extract_dropdown_content(url, section_name)
-
-finally:
-    logging.info("Scraping completed for ISSS website")
-    driver.quit()
-
-df_isss = pd.DataFrame(results, columns=['Section', 'Link', 'Title', 'Text'])
-
-# Save the DataFrame to an CSV file
-df_isss.to_csv('Data/isss_scraped_data.csv', index=False)
-
-# Set up Chrome options
-chrome_options = Options()
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-# chrome_options.add_argument("--headless")  # Uncomment to run in headless mode
-
-# Define research links with proper formatting
-Research_links = {
-    "CSEE Research Areas": "https://www.csee.umbc.edu/csee-research-areas/",
-    "Research Centers": "https://www.csee.umbc.edu/research-focus-areas-and-centers/",
-    "Research Labs CSEE": "https://www.csee.umbc.edu/research/research-labs/",
-    "AI Home": "https://ai.umbc.edu/",
-    "Research faculty": "https://ai.umbc.edu/ai-faculty/",
-    "Research Labs AI": "https://ai.umbc.edu/labs-groups/",
-    "Cyber Security labs": "https://cybersecurity.umbc.edu/training/labs/"
-}
-
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# Initialize a list to store the results
-results = []
-visited_links = set()
-
-# Define the main scraping process
-try:
-    logging.info("Scraping started for research data")
-    for section_name, url in Research_links.items():
-        print(f"Scraping section: {section_name}")
-        # Extract content from the main page for other sections
-        main_content = extract_main_content(url, section_name)
-        # Step 2: Extract collapsible sections (if any)
-        if main_content:
-            extract_collapsible_sections(main_content, url, section_name)
-
-            # Step 3: Identify and visit internal links within the main content
-            scrape_internal_links(main_content, section_name)
-
-            # Step 4: Scrape all links in the sidebar
-            scrape_sidebar_links(url, section_name)
-
-finally:
-    logging.info("Scraping completed for research data")
-    driver.quit()
-
-# Convert results to a DataFrame
-df_csee = pd.DataFrame(results, columns=['Section', 'Link', 'Title', 'Text'])
-# Save the DataFrame to an CSV file
-df_csee.to_csv('Data/research_data.csv', index=False)
-
-import subprocess
 
 def git_operations():
-            try:
-                # Stage the CSV files
-                subprocess.run([
-                    "git", "add",
-                    "dil_scraped_data.csv",
-                    "isss_scraped_data.csv",
-                    "research_data.csv",
-                ], check=True)
-
-                # Force add scraping_log.log
-                subprocess.run(["git", "add", "-f", "scraping_log.log"], check=True)
-
-                # Commit the changes
-                subprocess.run(["git", "commit", "-m", "Update scraped data files"], check=True)
-
-                # Push to the remote repository
-                subprocess.run(["git", "push"], check=True)
-
-                print("CSV files pushed to Git successfully.")
-            except subprocess.CalledProcessError as e:
-                print(f"Error during Git push: {e}")
+    """Commits and pushes the scraped data."""
+    try:
+        # Stage the corpus, its CSV exports and the changeset
+        subprocess.run(["git", "add", CORPUS_DIR, *SITE_CSV.values(), CHANGESET_PATH], check=True)
+
+        # Force add scraping_log.log and the freshness manifest
+        subprocess.run(["git", "add", "-f", SCRAPING_LOG, "freshness.json"], check=True)
+
+        # Commit the changes
+        subprocess.run(["git", "commit", "-m", "Update scraped data files"], check=True)
+
+        # Push to the remote repository
+        subprocess.run(["git", "push"], check=True)
+
+        print("Scraped data pushed to Git successfully.")
+    except subprocess.CalledProcessError as e:
+        print(f"Error during Git push: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the UMBC sites into the corpus.")
+    parser.add_argument("--site", action="append", choices=list(SITES), help="Site to scrape (repeatable); all by default")
+    parser.add_argument("--full", action="store_true", help="Extract every page again and refresh the page cache")
+    parser.add_argument("--publish", action="store_true", help="Commit and push the scraped data to Git")
+    args = parser.parse_args()
+
+    # Configure logging
+    logging.basicConfig(
+        filename=SCRAPING_LOG,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    # Incremental crawl: unchanged pages (per the page cache) are not extracted again and the corpus of a
+    # site is only rewritten when its records changed. A full crawl still refreshes the page cache, so the
+    # next incremental crawl serves the records of the current extractors.
+    incremental = os.getenv("SCRAPE_INCREMENTAL", "true").lower() in ("1", "true", "yes") and not args.full
+    scrape(
+        args.site,
+        fetcher=os.getenv("SCRAPE_FETCHER", "http"),
+        workers=int(os.getenv("SCRAPE_WORKERS", "8")),
+        per_host=int(os.getenv("SCRAPE_PER_HOST", "2")),
+        delay=float(os.getenv("SCRAPE_DELAY", "0.25")),
+        page_cache_path=os.getenv("PAGE_CACHE_PATH", PAGE_CACHE_PATH),
+        chromedriver_path=os.getenv("CHROMEDRIVER_PATH"),
+        full=not incremental
+    )
+
+    if args.publish or os.getenv("SCRAPE_PUBLISH", "false").lower() in ("1", "true", "yes"):
+        git_operations()
 
 
 if __name__ == "__main__":
-    git_operations()
+    main()
@@ -0,0 +1,228 @@
+# sessionstore.py
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from summarymemory import is_summary
+
+# Default feedback state for a new conversation
+DEFAULT_FEEDBACK_VARS = {
+    'last_intent': None,
+    'interaction_count': 0,
+    'feedback_requested': False,
+    'pending_conversation_data': None,
+    'feedback_timeout_counter': 0,
+    'MAX_FEEDBACK_PROMPTS': 2,
+    'last_answer_seconds': None
+}
+
+
+def new_memory():
+    return ConversationBufferMemory(memory_key="chat_history", output_key="answer", return_messages=True)
+
+
+def new_feedback_vars():
+    return dict(DEFAULT_FEEDBACK_VARS)
+
+
+def trim_memory(memory, max_messages):
+    """
+    Keeps only the last max_messages messages of the memory so a session cannot grow without limit.
+    The conversation summary, if there is one, is kept in front of them.
+    """
+    messages = memory.chat_memory.messages
+    if max_messages and len(messages) > max_messages:
+        summary = messages[:1] if is_summary(messages[0]) else []
+        # With max_messages 1 and a summary, only the summary is kept
+        keep = max(max_messages - len(summary), 0)
+        memory.chat_memory.messages = summary + messages[len(messages) - keep:]
+
+
+def _dump_feedback_vars(feedback_vars):
+    data = dict(feedback_vars)
+    pending = data.get('pending_conversation_data')
+    if pending:
+        pending = dict(pending)
+        pending['chat_history'] = messages_to_dict(pending.get('chat_history', []))
+        data['pending_conversation_data'] = pending
+    return json.dumps(data)
+
+
+def _load_feedback_vars(raw):
+    data = new_feedback_vars()
+    data.update(json.loads(raw))
+    pending = data.get('pending_conversation_data')
+    if pending:
+        pending['chat_history'] = messages_from_dict(pending.get('chat_history', []))
+    return data
+
+
+class SessionState:
+    """
+    Conversation memory and feedback variables of a single Dialogflow session.
+    """
+
+    def __init__(self, session_id, memory=None, feedback_vars=None):
+        self.session_id = session_id
+        self.memory = memory if memory is not None else new_memory()
+        self.feedback_vars = feedback_vars if feedback_vars is not None else new_feedback_vars()
+        self.last_seen = time.time()
+
+
+class SQLiteSessionBackend:
+    """
+    Stores session state in a SQLite file so conversations survive a restart.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, messages TEXT NOT NULL, "
+            "feedback_vars TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, session_id, ttl_seconds=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages, feedback_vars, updated_at FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        messages, feedback_vars, updated_at = row
+        if ttl_seconds and time.time() - updated_at > ttl_seconds:
+            self.delete(session_id)
+            return None
+        memory = new_memory()
+        memory.chat_memory.messages = messages_from_dict(json.loads(messages))
+        return SessionState(session_id, memory, _load_feedback_vars(feedback_vars))
+
+    def save(self, state):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, messages, feedback_vars, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    state.session_id,
+                    json.dumps(messages_to_dict(state.memory.chat_memory.messages)),
+                    _dump_feedback_vars(state.feedback_vars),
+                    state.last_seen
+                )
+            )
+            self._conn.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def purge_expired(self, ttl_seconds):
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - ttl_seconds,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class SessionStore:
+    """
+    Keeps per-session state keyed by the Dialogflow session, with LRU and idle-time (TTL) eviction.
+    Evicted sessions are reloaded from the backend, if one is configured.
+    With a summarizer, older turns are folded into a rolling summary in the background after each save.
+    """
+
+    def __init__(self, max_sessions=10000, ttl_seconds=3600, max_messages=20, backend=None, summarizer=None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.backend = backend
+        self.summarizer = summarizer
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, session_id):
+        """
+        Returns the state for session_id, creating (or reloading) it if needed.
+        The backend is read in a worker thread, off the event loop.
+        """
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None and self.ttl_seconds and now - state.last_seen > self.ttl_seconds:
+                # Idle for too long, start a fresh conversation
+                del self._sessions[session_id]
+                self.expirations += 1
+                state = None
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+                state.last_seen = now
+                return state
+
+        if self.backend is not None:
+            loop = asyncio.get_running_loop()
+            state = await loop.run_in_executor(None, self.backend.load, session_id, self.ttl_seconds)
+        if state is None:
+            state = SessionState(session_id)
+        state.last_seen = now
+
+        with self._lock:
+            # Another request of the session may have loaded it meanwhile
+            state = self._sessions.setdefault(session_id, state)
+            self._sessions.move_to_end(session_id)
+            self._evict()
+        return state
+
+    async def save(self, state):
+        """
+        Trims the session memory and writes the state to the backend, if one is configured, in a
+        worker thread.
+        """
+        trim_memory(state.memory, self.max_messages)
+        state.last_seen = time.time()
+        await self._persist(state)
+        if self.summarizer is not None:
+            self.summarizer.schedule(state, on_update=self._persist)
+
+    async def _persist(self, state):
+        if self.backend is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.backend.save, state)
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            # The least recently used sessions are at the front
+            while self._sessions:
+                session_id, state = next(iter(self._sessions.items()))
+                if state.last_seen >= cutoff:
+                    break
+                del self._sessions[session_id]
+                self.expirations += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        return {
+            "active_sessions": len(self._sessions),
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,113 @@
+# summarymemory.py
+
+import asyncio
+from langchain_core.messages import SystemMessage, get_buffer_string
+
+from chunking import truncate_tokens
+from metrics import metrics
+
+# Marks the message that holds the summary of the older turns
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+SUMMARY_PROMPT = """Progressively summarize the conversation between a student and a university assistant.
+Keep the facts the student gave (program, courses, visa status, dates) and the questions still open.
+Write at most {max_words} words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+
+
+def is_summary(message):
+    return isinstance(message, SystemMessage) and message.content.startswith(SUMMARY_PREFIX)
+
+
+def split_turns(messages):
+    """
+    Splits messages into the summary message (or None) and turns: a human message and the messages after it.
+    """
+    summary = messages[0] if messages and is_summary(messages[0]) else None
+    turns = []
+    for message in messages[1:] if summary is not None else messages:
+        if message.type == "human" or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return summary, turns
+
+
+class ConversationSummarizer:
+    """
+    Bounded conversation memory: the last keep_turns turns stay verbatim and older turns are folded
+    into one summary message at the start of the memory. The summary is updated by the LLM in a
+    background task after the response was sent, never on the request path. Turns are folded in
+    batches: once 2 * keep_turns turns are verbatim, all but the last keep_turns are folded, so there is
+    one summary call per keep_turns turns instead of one per turn.
+    """
+
+    def __init__(self, llm, keep_turns=3, max_summary_tokens=300):
+        self.llm = llm
+        self.keep_turns = keep_turns
+        self.max_summary_tokens = max_summary_tokens
+        # Sessions with a summary update in progress
+        self._running = {}
+
+    def schedule(self, state, on_update=None):
+        """
+        Starts a summary update for the session if it has a batch of turns to fold and none is running.
+        on_update(state) is awaited after the memory was updated, e.g. to persist it.
+        """
+        _, turns = split_turns(state.memory.chat_memory.messages)
+        if len(turns) < max(2 * self.keep_turns, self.keep_turns + 1) or state.session_id in self._running:
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not called from the server's event loop
+            return None
+        task = loop.create_task(self._update(state, on_update))
+        self._running[state.session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(state.session_id, None))
+        return task
+
+    async def _update(self, state, on_update):
+        messages = list(state.memory.chat_memory.messages)
+        summary, turns = split_turns(messages)
+        old_turns = turns[:len(turns) - self.keep_turns]
+        folded = [message for turn in old_turns for message in turn]
+        prompt = SUMMARY_PROMPT.format(
+            max_words=int(self.max_summary_tokens * 0.75),
+            summary=summary.content[len(SUMMARY_PREFIX):] if summary is not None else "",
+            new_lines=get_buffer_string(folded)
+        )
+        try:
+            with metrics.timer("summary_update"):
+                response = await self.llm.ainvoke(prompt)
+        except Exception as e:
+            print(f"Error updating the conversation summary: {e}")
+            metrics.incr("summary_update_errors")
+            return
+
+        # The memory may have grown (or been cleared) while the summary was computed
+        current = state.memory.chat_memory.messages
+        prefix = len(folded) + (summary is not None)
+        if len(current) < prefix or any(a is not b for a, b in zip(current, messages[:prefix])):
+            metrics.incr("summary_updates_discarded")
+            return
+        text = truncate_tokens(response.content.strip(), self.max_summary_tokens)
+        state.memory.chat_memory.messages = [SystemMessage(content=SUMMARY_PREFIX + text)] + current[prefix:]
+        metrics.incr("summary_updates")
+        metrics.incr("summary_turns_folded", len(old_turns))
+        if on_update is not None:
+            await on_update(state)
+
+    async def drain(self):
+        """
+        Waits for the running summary updates, e.g. at shutdown.
+        """
+        if self._running:
+            await asyncio.gather(*list(self._running.values()), return_exceptions=True)
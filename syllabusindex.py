@@ -0,0 +1,110 @@
+# syllabusindex.py
+
+import json
+import os
+import threading
+from langchain_core.documents import Document
+
+from datafiles import FileWatcher, atomic_write
+
+# File written next to the general Chroma collection by embeddings.py
+SYLLABUS_INDEX_FILE = "course_index.json"
+
+# Section of the scraped corpus that holds the course pages
+COURSES_SECTION = "Courses"
+
+
+def normalize_title(title):
+    return " ".join(str(title).lower().split())
+
+
+def build_course_index(chunks):
+    """
+    Maps every course page to its chunk IDs in document order.
+    chunks: {chunk ID: (text, metadata)} of the general collection.
+    """
+    courses = {}
+    for chunk, (_, metadata) in chunks.items():
+        if metadata.get("section") != COURSES_SECTION:
+            continue
+        course = courses.setdefault(normalize_title(metadata["title"]), {
+            "title": metadata["title"],
+            "link": metadata["link"],
+            "chunks": []
+        })
+        course["chunks"].append((metadata.get("parent_id"), metadata.get("chunk_index", 0), chunk))
+    for course in courses.values():
+        # Pages with the same title are kept in a stable order, each in its own chunk order
+        course["chunk_ids"] = [chunk for _, _, chunk in sorted(course.pop("chunks"), key=lambda item: (str(item[0]), item[1]))]
+    return courses
+
+
+def save_course_index(persist_directory, courses):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, SYLLABUS_INDEX_FILE)
+    with atomic_write(path) as file:
+        json.dump({"courses": courses}, file)
+
+
+class SyllabusIndex:
+    """
+    Fetches the syllabus chunks of a course by ID, in document order, without any embedding call.
+    The assembled chunks of each course are cached in memory until the index file changes.
+    """
+
+    def __init__(self, persist_directory, chunks_per_course=8):
+        self.path = os.path.join(persist_directory, SYLLABUS_INDEX_FILE)
+        self.chunks_per_course = chunks_per_course
+        self.courses = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._watcher = FileWatcher([self.path])
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as file:
+                courses = json.load(file)["courses"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"No syllabus index loaded from {self.path}: {e}")
+            return
+        with self._lock:
+            self.courses = courses
+            self._cache.clear()
+
+    def maybe_reload(self):
+        if self._watcher.changed():
+            self._load()
+
+    def available(self):
+        self.maybe_reload()
+        return bool(self.courses)
+
+    def chunk_ids(self, course_title):
+        course = self.courses.get(normalize_title(course_title))
+        if course is None:
+            return []
+        return course["chunk_ids"][:self.chunks_per_course]
+
+    def get_documents(self, course_titles, chroma_store):
+        """
+        Returns the syllabus chunks of every course, course by course in document order.
+        Blocking (reads Chroma), so call it from the search thread pool.
+        """
+        documents = []
+        for title in course_titles:
+            key = normalize_title(title)
+            with self._lock:
+                cached = self._cache.get(key)
+            if cached is None:
+                ids = self.chunk_ids(title)
+                found = {}
+                if ids:
+                    stored = chroma_store.get(ids=ids, include=["documents", "metadatas"])
+                    for chunk, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                        found[chunk] = Document(page_content=text, metadata=metadata)
+                cached = [found[chunk] for chunk in ids if chunk in found]
+                with self._lock:
+                    self._cache[key] = cached
+            documents.extend(cached)
+        return documents